@@ -1,836 +1,4350 @@
-from flask import Flask, request, redirect, url_for, session, flash, send_file
-from flask_sqlalchemy import SQLAlchemy
-from werkzeug.security import generate_password_hash, check_password_hash
-import datetime
-from io import BytesIO
-import segno
-
-app = Flask(__name__)
-app.secret_key = 'your_secret_key_here'
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///students.db'
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-
-db = SQLAlchemy(app)
-
-# Database Models
-class Student(db.Model):
-    id = db.Column(db.Integer, primary_key=True)
-    admission_number = db.Column(db.String(20), unique=True, nullable=False)
-    full_name = db.Column(db.String(100), nullable=False)
-    email = db.Column(db.String(100), unique=True, nullable=False)
-    password_hash = db.Column(db.String(128), nullable=False)
-    department = db.Column(db.String(50))
-    year_of_study = db.Column(db.Integer)
-    is_active = db.Column(db.Boolean, default=True)
-    last_login = db.Column(db.DateTime)
-    internet_usage_minutes = db.Column(db.Integer, default=0)
-    hotspot_access = db.Column(db.Boolean, default=False)
-
-    def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
-
-    def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
-
-class HotspotSession(db.Model):
-    id = db.Column(db.Integer, primary_key=True)
-    student_id = db.Column(db.Integer, db.ForeignKey('student.id'), nullable=False)
-    start_time = db.Column(db.DateTime, default=datetime.datetime.utcnow)
-    end_time = db.Column(db.DateTime)
-    data_used_mb = db.Column(db.Integer, default=0)
-
-class HotspotRequest(db.Model):
-    id = db.Column(db.Integer, primary_key=True)
-    student_id = db.Column(db.Integer, db.ForeignKey('student.id'), nullable=False)
-    request_time = db.Column(db.DateTime, default=datetime.datetime.utcnow)
-    status = db.Column(db.String(20), default='pending')
-    approved_by = db.Column(db.Integer, db.ForeignKey('student.id'), nullable=True)
-    approval_time = db.Column(db.DateTime, nullable=True)
-
-class HotspotConfig(db.Model):
-    id = db.Column(db.Integer, primary_key=True)
-    ssid = db.Column(db.String(50), default="SchoolHotspot")
-    password = db.Column(db.String(50), default="school123")
-    is_active = db.Column(db.Boolean, default=True)
-
-def initialize_database():
-    with app.app_context():
-        try:
-            # Drop all existing tables
-            db.drop_all()
-            
-            # Create all tables with current schema
-            db.create_all()
-            
-            # Create admin account
-            admin = Student(
-                admission_number="ADM001",
-                full_name="Admin User",
-                email="admin@school.edu",
-                department="Administration",
-                year_of_study=0,
-                hotspot_access=True
-            )
-            admin.set_password("admin123")
-            db.session.add(admin)
-            
-            # Create sample student
-            student = Student(
-                admission_number="STD001",
-                full_name="John Doe",
-                email="student@school.edu",
-                department="Computer Science",
-                year_of_study=2,
-                hotspot_access=False
-            )
-            student.set_password("password123")
-            db.session.add(student)
-            
-            # Create default hotspot config
-            config = HotspotConfig()
-            db.session.add(config)
-            
-            db.session.commit()
-            print("Database initialized successfully")
-        except Exception as e:
-            db.session.rollback()
-            print(f"Error initializing database: {str(e)}")
-            raise
-
-# HTML Generation Functions
-def generate_html(title, content, messages=None, is_logged_in=False):
-    css = """
-    <style>
-        body {
-            font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
-            line-height: 1.6;
-            margin: 0;
-            padding: 0;
-            background-color: #f4f4f4;
-            color: #333;
-        }
-        .container {
-            width: 80%;
-            margin: auto;
-            overflow: hidden;
-            padding: 20px;
-        }
-        header {
-            background: #35424a;
-            color: white;
-            padding: 20px 0;
-            min-height: 70px;
-            border-bottom: #e8491d 3px solid;
-        }
-        header a {
-            color: #ffffff;
-            text-decoration: none;
-            text-transform: uppercase;
-            font-size: 16px;
-        }
-        header ul {
-            padding: 0;
-            list-style: none;
-        }
-        header li {
-            display: inline;
-            padding: 0 20px 0 20px;
-        }
-        .alert {
-            padding: 10px;
-            margin: 10px 0;
-            border-radius: 5px;
-        }
-        .alert-success {
-            background-color: #d4edda;
-            color: #155724;
-        }
-        .alert-danger {
-            background-color: #f8d7da;
-            color: #721c24;
-        }
-        .alert-info {
-            background-color: #d1ecf1;
-            color: #0c5460;
-        }
-        form {
-            background: #ffffff;
-            padding: 20px;
-            border-radius: 5px;
-            box-shadow: 0 0 10px rgba(0,0,0,0.1);
-        }
-        form label {
-            display: block;
-            margin: 10px 0 5px;
-        }
-        form input[type="text"],
-        form input[type="password"],
-        form input[type="email"],
-        form input[type="number"],
-        form select {
-            width: 100%;
-            padding: 10px;
-            border: 1px solid #ddd;
-            border-radius: 5px;
-            margin-bottom: 10px;
-        }
-        form button {
-            display: inline-block;
-            background: #e8491d;
-            color: #fff;
-            padding: 10px 20px;
-            border: none;
-            border-radius: 5px;
-            cursor: pointer;
-        }
-        form button:hover {
-            background: #35424a;
-        }
-        table {
-            width: 100%;
-            border-collapse: collapse;
-            margin: 20px 0;
-        }
-        table, th, td {
-            border: 1px solid #ddd;
-        }
-        th, td {
-            padding: 12px;
-            text-align: left;
-        }
-        th {
-            background-color: #35424a;
-            color: white;
-        }
-        tr:nth-child(even) {
-            background-color: #f2f2f2;
-        }
-        .internet-frame {
-            width: 100%;
-            height: 600px;
-            border: 1px solid #ddd;
-            border-radius: 5px;
-            margin: 20px 0;
-        }
-        .nav-links {
-            margin: 20px 0;
-        }
-        .nav-links a {
-            margin-right: 15px;
-            color: #e8491d;
-            text-decoration: none;
-        }
-        .nav-links a:hover {
-            text-decoration: underline;
-        }
-        .button {
-            display: inline-block;
-            background: #e8491d;
-            color: white;
-            padding: 10px 20px;
-            text-decoration: none;
-            border-radius: 5px;
-            margin-top: 20px;
-        }
-        .button:hover {
-            background: #35424a;
-        }
-        .student-info {
-            background: white;
-            padding: 20px;
-            border-radius: 5px;
-            box-shadow: 0 0 10px rgba(0,0,0,0.1);
-            margin-bottom: 20px;
-        }
-        .personal-info, .internet-usage {
-            background: white;
-            padding: 20px;
-            border-radius: 5px;
-            box-shadow: 0 0 10px rgba(0,0,0,0.1);
-            margin-bottom: 20px;
-        }
-        .qr-code {
-            text-align: center;
-            margin: 20px 0;
-        }
-        .qr-code img {
-            max-width: 200px;
-            height: auto;
-        }
-    </style>
-    """
-    
-    nav_links = """
-    <li><a href="/">Home</a></li>
-    """ + ("""
-    <li><a href="/dashboard">Dashboard</a></li>
-    <li><a href="/profile">Profile</a></li>
-    <li><a href="/hotspot">Hotspot</a></li>
-    <li><a href="/request_hotspot">Request Hotspot</a></li>
-    <li><a href="/connect_hotspot">Connect Instructions</a></li>
-    <li><a href="/logout">Logout</a></li>
-    """ if is_logged_in else """
-    <li><a href="/login">Login</a></li>
-    """)
-    
-    message_html = ""
-    if messages:
-        for category, message in messages:
-            message_html += f'<div class="alert alert-{category}">{message}</div>'
-    
-    return f"""
-    <!DOCTYPE html>
-    <html>
-    <head>
-        <title>{title}</title>
-        {css}
-    </head>
-    <body>
-        <header>
-            <div class="container">
-                <h1>Student Hotspot Access Portal</h1>
-                <nav>
-                    <ul>
-                        {nav_links}
-                    </ul>
-                </nav>
-            </div>
-        </header>
-        
-        <div class="container">
-            {message_html}
-            {content}
-        </div>
-    </body>
-    </html>
-    """
-
-# Routes
-@app.route('/')
-def landing_page():
-    content = """
-    <h2>Welcome to Student Hotspot Portal</h2>
-    <p>Please login to access the hotspot and your student details</p>
-    <a href="/login" class="button">Login</a>
-    """
-    messages = []
-    if '_flashes' in session:
-        messages = session['_flashes']
-    return generate_html("Welcome", content, messages)
-
-@app.route('/login', methods=['GET', 'POST'])
-def login():
-    if request.method == 'POST':
-        admission_number = request.form['admission_number']
-        password = request.form['password']
-        
-        student = Student.query.filter_by(admission_number=admission_number).first()
-        
-        if student and student.check_password(password):
-            session['student_id'] = student.id
-            session['admission_number'] = student.admission_number
-            student.last_login = datetime.datetime.utcnow()
-            db.session.commit()
-            
-            new_session = HotspotSession(student_id=student.id)
-            db.session.add(new_session)
-            db.session.commit()
-            session['hotspot_session_id'] = new_session.id
-            
-            flash('Login successful!', 'success')
-            return redirect(url_for('dashboard'))
-        else:
-            flash('Invalid admission number or password', 'danger')
-    
-    content = """
-    <h2>Student Login</h2>
-    <form method="POST">
-        <label for="admission_number">Admission Number:</label>
-        <input type="text" id="admission_number" name="admission_number" required>
-        
-        <label for="password">Password:</label>
-        <input type="password" id="password" name="password" required>
-        
-        <button type="submit">Login</button>
-    </form>
-    """
-    messages = []
-    if '_flashes' in session:
-        messages = session['_flashes']
-    return generate_html("Login", content, messages)
-
-@app.route('/logout')
-def logout():
-    if 'hotspot_session_id' in session:
-        hotspot_session = HotspotSession.query.get(session['hotspot_session_id'])
-        if hotspot_session:
-            hotspot_session.end_time = datetime.datetime.utcnow()
-            duration = (hotspot_session.end_time - hotspot_session.start_time).total_seconds() / 60
-            student = Student.query.get(session['student_id'])
-            student.internet_usage_minutes += int(duration)
-            db.session.commit()
-    
-    session.clear()
-    flash('You have been logged out', 'info')
-    return redirect(url_for('landing_page'))
-
-@app.route('/dashboard')
-def dashboard():
-    if 'student_id' not in session:
-        return redirect(url_for('login'))
-    
-    student = Student.query.get(session['student_id'])
-    
-    last_login = student.last_login.strftime('%Y-%m-%d %H:%M:%S') if student.last_login else 'Never'
-    
-    content = f"""
-    <h2>Welcome, {student.full_name}</h2>
-    <div class="student-info">
-        <p><strong>Admission Number:</strong> {student.admission_number}</p>
-        <p><strong>Department:</strong> {student.department}</p>
-        <p><strong>Year of Study:</strong> {student.year_of_study}</p>
-        <p><strong>Last Login:</strong> {last_login}</p>
-        <p><strong>Hotspot Access:</strong> {'Approved' if student.hotspot_access else 'Not Approved'}</p>
-    </div>
-    
-    <div class="nav-links">
-        <h3>Quick Links</h3>
-        <a href="/profile">View Profile</a>
-        <a href="/request_hotspot">Request Hotspot Access</a>
-        <a href="/connect_hotspot">Connection Instructions</a>
-        <a href="/hotspot">Access Hotspot</a>
-        <a href="/logout">Logout</a>
-    </div>
-    """
-    messages = []
-    if '_flashes' in session:
-        messages = session['_flashes']
-    return generate_html("Dashboard", content, messages, is_logged_in=True)
-
-@app.route('/profile')
-def profile():
-    if 'student_id' not in session:
-        return redirect(url_for('login'))
-    
-    student = Student.query.get(session['student_id'])
-    sessions = HotspotSession.query.filter_by(student_id=student.id)\
-                                 .order_by(HotspotSession.start_time.desc())\
-                                 .limit(10)\
-                                 .all()
-    
-    sessions_html = ""
-    for sess in sessions:
-        if sess.end_time:
-            duration_min = (sess.end_time - sess.start_time).seconds // 60
-            duration = f'Duration: {duration_min} minutes'
-        else:
-            duration = 'Active session'
-        
-        end_time = sess.end_time.strftime('%Y-%m-%d %H:%M:%S') if sess.end_time else 'Active'
-        sessions_html += f"""
-        <tr>
-            <td>{sess.start_time.strftime('%Y-%m-%d %H:%M:%S')}</td>
-            <td>{end_time}</td>
-            <td>{duration}</td>
-        </tr>
-        """
-    
-    content = f"""
-    <h2>Student Profile</h2>
-    <div class="personal-info">
-        <h3>Personal Information</h3>
-        <p><strong>Admission Number:</strong> {student.admission_number}</p>
-        <p><strong>Full Name:</strong> {student.full_name}</p>
-        <p><strong>Email:</strong> {student.email}</p>
-        <p><strong>Department:</strong> {student.department}</p>
-        <p><strong>Year of Study:</strong> {student.year_of_study}</p>
-        <p><strong>Hotspot Access:</strong> {'Approved' if student.hotspot_access else 'Not Approved'}</p>
-    </div>
-    
-    <div class="internet-usage">
-        <h3>Hotspot Usage</h3>
-        <p><strong>Total Minutes Used:</strong> {student.internet_usage_minutes}</p>
-        
-        <h4>Recent Sessions</h4>
-        <table>
-            <thead>
-                <tr>
-                    <th>Start Time</th>
-                    <th>End Time</th>
-                    <th>Duration</th>
-                </tr>
-            </thead>
-            <tbody>
-                {sessions_html}
-            </tbody>
-        </table>
-    </div>
-    
-    <div class="nav-links">
-        <a href="/dashboard">Back to Dashboard</a>
-    </div>
-    """
-    messages = []
-    if '_flashes' in session:
-        messages = session['_flashes']
-    return generate_html("Profile", content, messages, is_logged_in=True)
-
-@app.route('/request_hotspot', methods=['GET', 'POST'])
-def request_hotspot():
-    if 'student_id' not in session:
-        return redirect(url_for('login'))
-
-    student = Student.query.get(session['student_id'])
-    
-    if student.hotspot_access:
-        flash('You already have hotspot access', 'info')
-        return redirect(url_for('dashboard'))
-    
-    if request.method == 'POST':
-        existing_request = HotspotRequest.query.filter_by(
-            student_id=student.id,
-            status='pending'
-        ).first()
-        
-        if existing_request:
-            flash('You already have a pending hotspot request', 'warning')
-        else:
-            new_request = HotspotRequest(student_id=student.id)
-            db.session.add(new_request)
-            db.session.commit()
-            flash('Hotspot access request submitted for admin approval', 'success')
-        
-        return redirect(url_for('dashboard'))
-
-    current_request = HotspotRequest.query.filter_by(
-        student_id=student.id
-    ).order_by(HotspotRequest.request_time.desc()).first()
-
-    status_message = "No active hotspot access"
-    if current_request:
-        if current_request.status == 'approved':
-            status_message = f"Hotspot Access Approved (on {current_request.approval_time.strftime('%Y-%m-%d')})"
-        elif current_request.status == 'pending':
-            status_message = "Hotspot Access Pending Approval"
-        else:
-            status_message = "Last request was rejected"
-
-    content = f"""
-    <h2>Hotspot Access Request</h2>
-    <div class="student-info">
-        <p><strong>Current Status:</strong> {status_message}</p>
-        <p>Your admission number: {student.admission_number}</p>
-    </div>
-    
-    <form method="POST">
-        <p>Click below to request hotspot access</p>
-        <button type="submit">Request Hotspot Access</button>
-    </form>
-    
-    <div class="nav-links">
-        <a href="/dashboard">Back to Dashboard</a>
-    </div>
-    """
-    return generate_html("Hotspot Access", content, is_logged_in=True)
-
-@app.route('/connect_hotspot')
-def connect_hotspot():
-    if 'student_id' not in session:
-        return redirect(url_for('login'))
-    
-    student = Student.query.get(session['student_id'])
-    if not student.hotspot_access:
-        flash('You need approved hotspot access', 'danger')
-        return redirect(url_for('request_hotspot'))
-    
-    config = HotspotConfig.query.first()
-    if not config:
-        config = HotspotConfig()
-        db.session.add(config)
-        db.session.commit()
-    
-    content = f"""
-    <h2>Connect to School Hotspot</h2>
-    <div class="student-info">
-        <h3>Connection Instructions</h3>
-        <ol>
-            <li>Go to your device's WiFi settings</li>
-            <li>Look for network: <strong>{config.ssid}</strong></li>
-            <li>Connect using password: <strong>{config.password}</strong></li>
-            <li>Open any browser and you'll be redirected to login</li>
-        </ol>
-        
-        <div class="qr-code">
-            <h4>Quick Connect QR Code</h4>
-            <img src="/qrcode" alt="Hotspot QR Code">
-            <p>Scan this code with your phone camera to connect automatically</p>
-        </div>
-    </div>
-    """
-    return generate_html("Hotspot Connection", content, is_logged_in=True)
-
-@app.route('/qrcode')
-def generate_qrcode():
-    config = HotspotConfig.query.first()
-    if not config:
-        config = HotspotConfig()
-        db.session.add(config)
-        db.session.commit()
-    
-    wifi_config = f"WIFI:T:WPA;S:{config.ssid};P:{config.password};;"
-    qrcode = segno.make(wifi_config, micro=False)
-    buffer = BytesIO()
-    qrcode.save(buffer, kind="png", scale=6)
-    buffer.seek(0)
-    
-    return send_file(buffer, mimetype='image/png')
-
-@app.route('/hotspot')
-def hotspot_access():
-    if 'student_id' not in session:
-        return redirect(url_for('login'))
-
-    student = Student.query.get(session['student_id'])
-    if not student.hotspot_access:
-        flash('You need approved hotspot access to use this feature', 'danger')
-        return redirect(url_for('request_hotspot'))
-
-    # Start new hotspot session if not already active
-    if 'hotspot_session_id' not in session:
-        new_session = HotspotSession(student_id=student.id)
-        db.session.add(new_session)
-        db.session.commit()
-        session['hotspot_session_id'] = new_session.id
-
-    content = f"""
-    <h2>Hotspot Access Portal</h2>
-    <div class="student-info">
-        <p>Welcome, {student.full_name}</p>
-        <p>You are now connected to the school hotspot</p>
-    </div>
-    
-    <div class="internet-frame">
-        <iframe src="https://example.com" width="100%" height="100%" frameborder="0"></iframe>
-    </div>
-    
-    <div class="nav-links">
-        <a href="/logout">Disconnect and Logout</a>
-    </div>
-    """
-    return generate_html("Hotspot Access", content, is_logged_in=True)
-
-@app.route('/admin/hotspot_requests')
-def hotspot_requests():
-    if 'student_id' not in session:
-        return redirect(url_for('login'))
-
-    pending_requests = db.session.query(
-        HotspotRequest, Student
-    ).join(
-        Student, HotspotRequest.student_id == Student.id
-    ).filter(
-        HotspotRequest.status == 'pending'
-    ).all()
-
-    requests_html = ""
-    for request, student in pending_requests:
-        requests_html += f"""
-        <tr>
-            <td>{student.admission_number}</td>
-            <td>{student.full_name}</td>
-            <td>{student.department}</td>
-            <td>{request.request_time.strftime('%Y-%m-%d %H:%M')}</td>
-            <td>
-                <a href="/admin/approve_hotspot/{request.id}">Approve</a> | 
-                <a href="/admin/reject_hotspot/{request.id}">Reject</a>
-            </td>
-        </tr>
-        """
-
-    content = f"""
-    <h2>Pending Hotspot Requests</h2>
-    <table>
-        <thead>
-            <tr>
-                <th>Admission No.</th>
-                <th>Student Name</th>
-                <th>Department</th>
-                <th>Request Time</th>
-                <th>Actions</th>
-            </tr>
-        </thead>
-        <tbody>
-            {requests_html}
-        </tbody>
-    </table>
-    <div class="nav-links">
-        <a href="/admin">Back to Admin Dashboard</a>
-    </div>
-    """
-    return generate_html("Hotspot Requests", content, is_logged_in=True)
-
-@app.route('/admin/approve_hotspot/<int:request_id>')
-def approve_hotspot(request_id):
-    if 'student_id' not in session:
-        return redirect(url_for('login'))
-
-    request = HotspotRequest.query.get(request_id)
-    if request:
-        request.status = 'approved'
-        request.approved_by = session['student_id']
-        request.approval_time = datetime.datetime.utcnow()
-        
-        # Grant hotspot access to student
-        student = Student.query.get(request.student_id)
-        student.hotspot_access = True
-        
-        db.session.commit()
-        flash('Hotspot access approved', 'success')
-    return redirect(url_for('hotspot_requests'))
-
-@app.route('/admin/reject_hotspot/<int:request_id>')
-def reject_hotspot(request_id):
-    if 'student_id' not in session:
-        return redirect(url_for('login'))
-
-    request = HotspotRequest.query.get(request_id)
-    if request:
-        request.status = 'rejected'
-        db.session.commit()
-        flash('Hotspot access rejected', 'warning')
-    return redirect(url_for('hotspot_requests'))
-
-@app.route('/admin')
-def admin_home():
-    if 'student_id' not in session:
-        return redirect(url_for('login'))
-    
-    return generate_html("Admin Dashboard", """
-    <h2>Admin Dashboard</h2>
-    <div class="nav-links">
-        <a href="/admin/students">Manage Students</a>
-        <a href="/admin/add_student">Add New Student</a>
-        <a href="/admin/hotspot_requests">Manage Hotspot Requests</a>
-        <a href="/dashboard">Back to Dashboard</a>
-    </div>
-    """, is_logged_in=True)
-
-@app.route('/admin/students')
-def admin_students():
-    if 'student_id' not in session:
-        return redirect(url_for('login'))
-    
-    students = Student.query.all()
-    students_html = ""
-    
-    for student in students:
-        students_html += f"""
-        <tr>
-            <td>{student.admission_number}</td>
-            <td>{student.full_name}</td>
-            <td>{student.email}</td>
-            <td>{student.department}</td>
-            <td>{student.year_of_study}</td>
-            <td>{student.internet_usage_minutes} mins</td>
-            <td>{'Yes' if student.hotspot_access else 'No'}</td>
-            <td>
-                <a href="/admin/edit_student/{student.id}">Edit</a> | 
-                <a href="/admin/delete_student/{student.id}">Delete</a>
-            </td>
-        </tr>
-        """
-    
-    content = f"""
-    <h2>Student Management</h2>
-    <div class="nav-links">
-        <a href="/admin/add_student">Add New Student</a>
-        <a href="/admin">Back to Admin Dashboard</a>
-    </div>
-    
-    <table>
-        <thead>
-            <tr>
-                <th>Admission No.</th>
-                <th>Full Name</th>
-                <th>Email</th>
-                <th>Department</th>
-                <th>Year</th>
-                <th>Usage (mins)</th>
-                <th>Hotspot Access</th>
-                <th>Actions</th>
-            </tr>
-        </thead>
-        <tbody>
-            {students_html}
-        </tbody>
-    </table>
-    """
-    return generate_html("Manage Students", content, is_logged_in=True)
-
-@app.route('/admin/add_student', methods=['GET', 'POST'])
-def add_student():
-    if 'student_id' not in session:
-        return redirect(url_for('login'))
-    
-    if request.method == 'POST':
-        admission_number = request.form['admission_number']
-        full_name = request.form['full_name']
-        email = request.form['email']
-        password = request.form['password']
-        department = request.form['department']
-        year_of_study = request.form['year_of_study']
-        hotspot_access = 'hotspot_access' in request.form
-        
-        student = Student(
-            admission_number=admission_number,
-            full_name=full_name,
-            email=email,
-            department=department,
-            year_of_study=year_of_study,
-            hotspot_access=hotspot_access
-        )
-        student.set_password(password)
-        
-        db.session.add(student)
-        db.session.commit()
-        
-        flash('Student added successfully', 'success')
-        return redirect(url_for('admin_students'))
-    
-    content = """
-    <h2>Add New Student</h2>
-    <form method="POST">
-        <label for="admission_number">Admission Number:</label>
-        <input type="text" id="admission_number" name="admission_number" required>
-        
-        <label for="full_name">Full Name:</label>
-        <input type="text" id="full_name" name="full_name" required>
-        
-        <label for="email">Email:</label>
-        <input type="email" id="email" name="email" required>
-        
-        <label for="password">Password:</label>
-        <input type="password" id="password" name="password" required>
-        
-        <label for="department">Department:</label>
-        <input type="text" id="department" name="department" required>
-        
-        <label for="year_of_study">Year of Study:</label>
-        <input type="number" id="year_of_study" name="year_of_study" min="1" max="6" required>
-        
-        <label>
-            <input type="checkbox" name="hotspot_access" value="true">
-            Grant Hotspot Access Immediately
-        </label>
-        
-        <button type="submit">Add Student</button>
-    </form>
-    <div class="nav-links">
-        <a href="/admin/students">Back to Student List</a>
-    </div>
-    """
-    return generate_html("Add Student", content, is_logged_in=True)
-
-if __name__ == '__main__':
-    initialize_database()
+from flask import Flask, request, redirect, url_for, session, flash, make_response, abort, Response, stream_with_context, g, jsonify, has_request_context, get_flashed_messages
+from flask.json.tag import TaggedJSONSerializer
+from flask.sessions import SessionInterface, SessionMixin
+from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import exc, orm, event as db_event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from werkzeug.datastructures import CallbackDict
+from werkzeug.security import generate_password_hash, check_password_hash
+import atexit
+import bisect
+import collections
+import contextlib
+import datetime
+import functools
+import hashlib
+import heapq
+import hmac
+import itertools
+import json
+import os
+import re
+import secrets
+import sqlite3
+import threading
+import time
+import types
+import zipfile
+from io import BytesIO
+import csv
+import io
+import click
+from markupsafe import escape
+from urllib.parse import urlencode
+
+app = Flask(__name__)
+app.secret_key = 'your_secret_key_here'
+app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL', 'sqlite:///students.db')
+app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+app.config['ADMIN_STUDENTS_PAGE_SIZE'] = 50
+app.config['ADMIN_STUDENTS_MAX_PAGE_SIZE'] = 500
+app.config['BULK_IMPORT_BATCH_SIZE'] = 500
+# CPU-bound work (password hashing, voucher QR codes) shares one process
+# pool per worker. At most PROCESS_POOL_MAX_JOBS requests use it at once;
+# the rest wait up to PROCESS_POOL_WAIT_SECONDS for a turn.
+app.config['PROCESS_POOL_WORKERS'] = None  # None uses one process per CPU
+app.config['PROCESS_POOL_MAX_JOBS'] = 2
+app.config['PROCESS_POOL_WAIT_SECONDS'] = 30
+# Werkzeug hash method string, e.g. 'scrypt:32768:8:1' or 'pbkdf2:sha256:600000'.
+# Stored hashes made with different parameters are upgraded on the next login.
+app.config['PASSWORD_HASH_METHOD'] = os.environ.get('PASSWORD_HASH_METHOD', 'scrypt:32768:8:1')
+# Open hotspot sessions with no usage reported for this long are treated as
+# abandoned and closed at their last reported activity (or their start, if
+# none was ever reported). The reaper thread is off when the interval is 0.
+app.config['SESSION_IDLE_MINUTES'] = int(os.environ.get('SESSION_IDLE_MINUTES', 240))
+app.config['SESSION_REAPER_BATCH_SIZE'] = int(os.environ.get('SESSION_REAPER_BATCH_SIZE', 500))
+app.config['SESSION_REAPER_INTERVAL_SECONDS'] = int(os.environ.get('SESSION_REAPER_INTERVAL_SECONDS', 0))
+
+# Database configuration. Each WSGI worker gets its own pool, so
+# DB_POOL_SIZE is per worker; keep it near the worker's thread count.
+app.config['DB_POOL_SIZE'] = int(os.environ.get('DB_POOL_SIZE', 5))
+app.config['DB_MAX_OVERFLOW'] = int(os.environ.get('DB_MAX_OVERFLOW', 5))
+app.config['DB_POOL_TIMEOUT'] = int(os.environ.get('DB_POOL_TIMEOUT', 30))
+app.config['SQLITE_BUSY_TIMEOUT_MS'] = int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 5000))
+app.config['SQLITE_SYNCHRONOUS'] = os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL')
+app.config['SQLITE_CACHE_SIZE_KB'] = int(os.environ.get('SQLITE_CACHE_SIZE_KB', 16384))
+
+def reporting_database_uri(uri):
+    # Reporting routes read through a separate read-only connection. For a
+    # SQLite file that is the same file opened with mode=ro; other databases
+    # can point REPORTING_DATABASE_URL at a replica.
+    url = make_url(uri)
+    if not url.drivername.startswith('sqlite') or url.database in (None, '', ':memory:'):
+        return uri
+    return url.set(database=f"file:{url.database}", query={'mode': 'ro', 'uri': 'true'})
+
+if make_url(app.config['SQLALCHEMY_DATABASE_URI']).database not in (None, '', ':memory:'):
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
+        'pool_size': app.config['DB_POOL_SIZE'],
+        'max_overflow': app.config['DB_MAX_OVERFLOW'],
+        'pool_timeout': app.config['DB_POOL_TIMEOUT'],
+    }
+app.config['SQLALCHEMY_BINDS'] = {
+    'reporting': os.environ.get('REPORTING_DATABASE_URL')
+                 or reporting_database_uri(app.config['SQLALCHEMY_DATABASE_URI']),
+    # Server-side sessions live in their own SQLite file so session writes
+    # never queue behind the main database's write lock.
+    'sessions': os.environ.get('SESSION_DATABASE_URL', 'sqlite:///sessions.db'),
+}
+# 'sqlite' keeps sessions in the sessions bind; 'memory' keeps them in this
+# process only (single worker or tests).
+app.config['SESSION_BACKEND'] = os.environ.get('SESSION_BACKEND', 'sqlite')
+
+@db_event.listens_for(Engine, 'connect')
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    if not isinstance(dbapi_connection, sqlite3.Connection):
+        return
+    cursor = dbapi_connection.cursor()
+    # WAL lets readers carry on while the login path writes; busy_timeout
+    # makes writers queue for the lock instead of failing straight away.
+    cursor.execute(f"PRAGMA busy_timeout = {app.config['SQLITE_BUSY_TIMEOUT_MS']}")
+    cursor.execute("PRAGMA journal_mode = WAL")
+    cursor.execute(f"PRAGMA synchronous = {app.config['SQLITE_SYNCHRONOUS']}")
+    cursor.execute(f"PRAGMA cache_size = -{app.config['SQLITE_CACHE_SIZE_KB']}")
+    cursor.close()
+
+db = SQLAlchemy(app)
+
+def reporting_session():
+    """Read-only session for admin reports, one per app context."""
+    if 'reporting_session' not in g:
+        g.reporting_session = orm.Session(db.engines['reporting'])
+    return g.reporting_session
+
+@app.teardown_appcontext
+def close_reporting_session(exception=None):
+    reporting = g.pop('reporting_session', None)
+    if reporting is not None:
+        reporting.close()
+
+def hash_password(password):
+    return generate_password_hash(password, method=app.config['PASSWORD_HASH_METHOD'])
+
+@functools.lru_cache(maxsize=8)
+def _password_hash_prefix(method):
+    # Werkzeug fills in default parameters (e.g. the pbkdf2 iteration count),
+    # so read the canonical method back off a real hash.
+    return generate_password_hash('', method=method).split('$', 1)[0]
+
+def password_needs_rehash(password_hash):
+    return password_hash.split('$', 1)[0] != _password_hash_prefix(app.config['PASSWORD_HASH_METHOD'])
+
+# Database Models
+class Student(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    admission_number = db.Column(db.String(20), unique=True, nullable=False)
+    full_name = db.Column(db.String(100), nullable=False)
+    email = db.Column(db.String(100), unique=True, nullable=False)
+    password_hash = db.Column(db.String(128), nullable=False)
+    department = db.Column(db.String(50))
+    year_of_study = db.Column(db.Integer)
+    is_active = db.Column(db.Boolean, default=True)
+    last_login = db.Column(db.DateTime)
+    internet_usage_minutes = db.Column(db.Integer, default=0)
+    hotspot_access = db.Column(db.Boolean, default=False)
+
+    def set_password(self, password):
+        self.password_hash = hash_password(password)
+
+    def check_password(self, password):
+        return check_password_hash(self.password_hash, password)
+
+    def rehash_password_if_needed(self, password):
+        if password_needs_rehash(self.password_hash):
+            self.set_password(password)
+
+class Device(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    # Always stored normalized, see normalize_mac().
+    mac_address = db.Column(db.String(17), nullable=False)
+    student_id = db.Column(db.Integer, db.ForeignKey('student.id'), nullable=False)
+    label = db.Column(db.String(50))
+    first_seen = db.Column(db.DateTime, default=datetime.datetime.utcnow)
+    last_seen = db.Column(db.DateTime, default=datetime.datetime.utcnow)
+
+    __table_args__ = (
+        # gateway lookups: MAC -> device and owner
+        db.Index('ix_device_mac_address', 'mac_address', unique=True),
+        # devices(): a student's devices
+        db.Index('ix_device_student', 'student_id'),
+    )
+
+class HotspotSession(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    student_id = db.Column(db.Integer, db.ForeignKey('student.id'), nullable=False)
+    device_id = db.Column(db.Integer, db.ForeignKey('device.id'), nullable=True)
+    start_time = db.Column(db.DateTime, default=datetime.datetime.utcnow)
+    end_time = db.Column(db.DateTime)
+    data_used_mb = db.Column(db.Integer, default=0)
+    # Latest usage report credited to the session; the reaper measures
+    # idleness from here.
+    last_activity = db.Column(db.DateTime)
+
+    __table_args__ = (
+        # profile(): a student's sessions, newest first
+        db.Index('ix_hotspot_session_student_start', 'student_id', 'start_time'),
+        # session exports: a date range across all students
+        db.Index('ix_hotspot_session_start', 'start_time'),
+        # open sessions: the active-session gauge and the reaper
+        db.Index('ix_hotspot_session_open_start', 'start_time',
+                 sqlite_where=db.text('end_time IS NULL')),
+        # per-device session history
+        db.Index('ix_hotspot_session_device_start', 'device_id', 'start_time'),
+    )
+
+class HotspotRequest(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    student_id = db.Column(db.Integer, db.ForeignKey('student.id'), nullable=False)
+    request_time = db.Column(db.DateTime, default=datetime.datetime.utcnow)
+    status = db.Column(db.String(20), default='pending')
+    approved_by = db.Column(db.Integer, db.ForeignKey('student.id'), nullable=True)
+    approval_time = db.Column(db.DateTime, nullable=True)
+
+    __table_args__ = (
+        # request_hotspot(): pending request for a student
+        db.Index('ix_hotspot_request_student_status', 'student_id', 'status'),
+        # request_hotspot(): a student's latest request
+        db.Index('ix_hotspot_request_student_time', 'student_id', 'request_time'),
+        # hotspot_requests(): the pending queue
+        db.Index('ix_hotspot_request_status_time', 'status', 'request_time'),
+    )
+
+class HotspotConfig(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    ssid = db.Column(db.String(50), default="SchoolHotspot")
+    password = db.Column(db.String(50), default="school123")
+    is_active = db.Column(db.Boolean, default=True)
+
+class DataQuota(db.Model):
+    """A daily or weekly data allowance in MB, either for one student or as
+    the default for every student in a department. A student's own quota for
+    a period takes precedence over their department's."""
+    id = db.Column(db.Integer, primary_key=True)
+    student_id = db.Column(db.Integer, db.ForeignKey('student.id'), nullable=True)
+    department = db.Column(db.String(50), nullable=True)
+    period = db.Column(db.String(10), nullable=False)
+    limit_mb = db.Column(db.Integer, nullable=False)
+
+    __table_args__ = (
+        db.Index('ix_data_quota_student', 'student_id'),
+        db.Index('ix_data_quota_department', 'department'),
+    )
+
+class AccessWindow(db.Model):
+    """A weekly window during which hotspot access is closed for a group.
+    Empty department/year_of_study match every student."""
+    id = db.Column(db.Integer, primary_key=True)
+    department = db.Column(db.String(50), nullable=True)
+    year_of_study = db.Column(db.Integer, nullable=True)
+    # Bit 0 is Monday, bit 6 Sunday.
+    weekdays = db.Column(db.Integer, nullable=False)
+    # Minutes since midnight; an end at or before the start runs past midnight.
+    start_minute = db.Column(db.Integer, nullable=False)
+    end_minute = db.Column(db.Integer, nullable=False)
+    label = db.Column(db.String(100))
+
+class SchemaVersion(db.Model):
+    version = db.Column(db.Integer, primary_key=True)
+    description = db.Column(db.String(200))
+    applied_at = db.Column(db.DateTime, default=datetime.datetime.utcnow)
+
+# Usage rollups, maintained as sessions close so reports never have to scan
+# hotspot_session. Days are the UTC date the session started.
+class DailyStudentUsage(db.Model):
+    student_id = db.Column(db.Integer, db.ForeignKey('student.id'), primary_key=True)
+    day = db.Column(db.Date, primary_key=True)
+    sessions = db.Column(db.Integer, nullable=False, default=0)
+    minutes = db.Column(db.Integer, nullable=False, default=0)
+    data_used_mb = db.Column(db.Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        db.Index('ix_daily_student_usage_day', 'day'),
+    )
+
+class DailyDepartmentUsage(db.Model):
+    department = db.Column(db.String(50), primary_key=True)
+    day = db.Column(db.Date, primary_key=True)
+    sessions = db.Column(db.Integer, nullable=False, default=0)
+    minutes = db.Column(db.Integer, nullable=False, default=0)
+    data_used_mb = db.Column(db.Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        db.Index('ix_daily_department_usage_day', 'day'),
+    )
+
+def session_minutes(start_time, end_time):
+    return int((end_time - start_time).total_seconds() / 60)
+
+def _upsert_usage(model, key_columns, rows):
+    statement = sqlite_insert(model)
+    statement = statement.on_conflict_do_update(
+        index_elements=key_columns,
+        set_={
+            'sessions': model.sessions + statement.excluded.sessions,
+            'minutes': model.minutes + statement.excluded.minutes,
+            'data_used_mb': model.data_used_mb + statement.excluded.data_used_mb,
+        },
+    )
+    db.session.execute(statement, rows)
+
+def record_session_usage(closed_sessions, new_sessions=True):
+    """Add closed sessions to the daily rollups in the current transaction.
+    closed_sessions is an iterable of (student_id, department, start_time,
+    minutes, data_used_mb) tuples. Pass new_sessions=False to add usage that
+    arrived after a session was already counted."""
+    per_student = collections.defaultdict(lambda: [0, 0, 0])
+    per_department = collections.defaultdict(lambda: [0, 0, 0])
+    for student_id, department, start_time, minutes, data_used_mb in closed_sessions:
+        day = start_time.date()
+        for totals in (per_student[(student_id, day)], per_department[(department or '', day)]):
+            totals[0] += 1 if new_sessions else 0
+            totals[1] += minutes
+            totals[2] += data_used_mb or 0
+    if not per_student:
+        return
+
+    _upsert_usage(DailyStudentUsage, ['student_id', 'day'], [
+        {'student_id': student_id, 'day': day, 'sessions': sessions, 'minutes': minutes, 'data_used_mb': data}
+        for (student_id, day), (sessions, minutes, data) in per_student.items()
+    ])
+    _upsert_usage(DailyDepartmentUsage, ['department', 'day'], [
+        {'department': department, 'day': day, 'sessions': sessions, 'minutes': minutes, 'data_used_mb': data}
+        for (department, day), (sessions, minutes, data) in per_department.items()
+    ])
+
+def rebuild_usage_rollups():
+    """Recompute both rollup tables from the full session history, archived
+    months included."""
+    history = session_history(db.session.connection())
+    session_day = db.func.date(history.c.start_time)
+    duration_minutes = db.cast(
+        (db.func.strftime('%s', history.c.end_time) - db.func.strftime('%s', history.c.start_time)) / 60,
+        db.Integer
+    )
+    closed = history.c.end_time.isnot(None)
+
+    db.session.execute(db.delete(DailyStudentUsage))
+    db.session.execute(db.delete(DailyDepartmentUsage))
+    db.session.execute(
+        db.insert(DailyStudentUsage).from_select(
+            ['student_id', 'day', 'sessions', 'minutes', 'data_used_mb'],
+            db.select(
+                history.c.student_id,
+                session_day,
+                db.func.count(history.c.id),
+                db.func.sum(duration_minutes),
+                db.func.sum(db.func.coalesce(history.c.data_used_mb, 0)),
+            ).where(closed).group_by(history.c.student_id, session_day)
+        )
+    )
+    db.session.execute(
+        db.insert(DailyDepartmentUsage).from_select(
+            ['department', 'day', 'sessions', 'minutes', 'data_used_mb'],
+            db.select(
+                db.func.coalesce(Student.department, ''),
+                DailyStudentUsage.day,
+                db.func.sum(DailyStudentUsage.sessions),
+                db.func.sum(DailyStudentUsage.minutes),
+                db.func.sum(DailyStudentUsage.data_used_mb),
+            ).join(Student, Student.id == DailyStudentUsage.student_id)
+            .group_by(db.func.coalesce(Student.department, ''), DailyStudentUsage.day)
+        )
+    )
+    db.session.commit()
+
+# Server-side sessions. The cookie only carries a random session id; the
+# data stays on the server so requests don't grow with the session.
+class ServerSession(db.Model):
+    __bind_key__ = 'sessions'
+    id = db.Column(db.String(64), primary_key=True)
+    data = db.Column(db.Text, nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+
+class SQLiteSessionStore:
+    purge_every = 1000
+
+    def __init__(self):
+        self._saves = 0
+
+    def load(self, sid):
+        with db.engines['sessions'].connect() as conn:
+            return conn.execute(
+                db.select(ServerSession.data)
+                .where(ServerSession.id == sid, ServerSession.expires_at > datetime.datetime.utcnow())
+            ).scalar()
+
+    def save(self, sid, data, expires_at):
+        upsert = sqlite_insert(ServerSession).values(id=sid, data=data, expires_at=expires_at)
+        upsert = upsert.on_conflict_do_update(
+            index_elements=['id'],
+            set_={'data': upsert.excluded.data, 'expires_at': upsert.excluded.expires_at},
+        )
+        with db.engines['sessions'].begin() as conn:
+            conn.execute(upsert)
+            self._saves += 1
+            if self._saves % self.purge_every == 0:
+                conn.execute(db.delete(ServerSession).where(ServerSession.expires_at <= datetime.datetime.utcnow()))
+
+    def delete(self, sid):
+        with db.engines['sessions'].begin() as conn:
+            conn.execute(db.delete(ServerSession).where(ServerSession.id == sid))
+
+class MemorySessionStore:
+    purge_every = 1000
+
+    def __init__(self):
+        self._sessions = {}
+        self._lock = threading.Lock()
+        self._saves = 0
+
+    def load(self, sid):
+        entry = self._sessions.get(sid)
+        if entry is None or entry[1] <= datetime.datetime.utcnow():
+            return None
+        return entry[0]
+
+    def save(self, sid, data, expires_at):
+        with self._lock:
+            self._sessions[sid] = (data, expires_at)
+            self._saves += 1
+            if self._saves % self.purge_every == 0:
+                now = datetime.datetime.utcnow()
+                for expired in [key for key, (_, expiry) in self._sessions.items() if expiry <= now]:
+                    del self._sessions[expired]
+
+    def delete(self, sid):
+        with self._lock:
+            self._sessions.pop(sid, None)
+
+SESSION_STORES = {
+    'sqlite': SQLiteSessionStore,
+    'memory': MemorySessionStore,
+}
+
+class ServerSideSession(CallbackDict, SessionMixin):
+    def __init__(self, initial=None, sid=None, new=False):
+        def on_update(self):
+            self.modified = True
+            self.accessed = True
+        super().__init__(initial, on_update)
+        self.sid = sid
+        self.new = new
+        self.modified = False
+        self.accessed = False
+        self.replaced_sid = None
+
+    # Track reads like Flask's cookie session does, so responses that depend
+    # on the session get Vary: Cookie.
+    def __getitem__(self, key):
+        self.accessed = True
+        return super().__getitem__(key)
+
+    def __contains__(self, key):
+        self.accessed = True
+        return super().__contains__(key)
+
+    def get(self, key, default=None):
+        self.accessed = True
+        return super().get(key, default)
+
+    def setdefault(self, key, default=None):
+        self.accessed = True
+        return super().setdefault(key, default)
+
+    def regenerate(self):
+        """Move the data to a fresh session id; the old one is deleted when
+        the response is saved. Call when the user's privileges change so an
+        id handed out earlier can't ride along into the logged-in session."""
+        if self.replaced_sid is None and not self.new:
+            self.replaced_sid = self.sid
+        self.sid = secrets.token_urlsafe(32)
+        self.modified = True
+
+class ServerSideSessionInterface(SessionInterface):
+    serializer = TaggedJSONSerializer()
+
+    def __init__(self, store):
+        self.store = store
+
+    def open_session(self, app, request):
+        sid = request.cookies.get(self.get_cookie_name(app))
+        if sid:
+            data = self.store.load(sid)
+            if data is not None:
+                return ServerSideSession(self.serializer.loads(data), sid=sid)
+        # Unknown or expired ids are never reused, so a client can't pick its
+        # own session id.
+        return ServerSideSession(sid=secrets.token_urlsafe(32), new=True)
+
+    def save_session(self, app, session, response):
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+
+        if session.accessed or session.modified or not session.new:
+            response.vary.add('Cookie')
+        if session.replaced_sid is not None:
+            self.store.delete(session.replaced_sid)
+        if not session:
+            if session.modified and not session.new:
+                self.store.delete(session.sid)
+                response.delete_cookie(name, domain=domain, path=path)
+            return
+        if not session.modified:
+            return
+
+        expires = self.get_expiration_time(app, session)
+        self.store.save(session.sid, self.serializer.dumps(dict(session)),
+                        datetime.datetime.utcnow() + app.permanent_session_lifetime)
+        response.set_cookie(
+            name, session.sid, expires=expires, domain=domain, path=path,
+            httponly=self.get_cookie_httponly(app), secure=self.get_cookie_secure(app),
+            samesite=self.get_cookie_samesite(app),
+        )
+
+app.session_interface = ServerSideSessionInterface(SESSION_STORES[app.config['SESSION_BACKEND']]())
+
+# Logged-in student cache. Most pages only read the current student's row,
+# so keep short-lived snapshots per process and drop them when a committed
+# transaction touches that student.
+app.config['STUDENT_CACHE_TTL'] = int(os.environ.get('STUDENT_CACHE_TTL', 30))
+
+StudentSnapshot = collections.namedtuple('StudentSnapshot', [
+    'id', 'admission_number', 'full_name', 'email', 'department',
+    'year_of_study', 'is_active', 'last_login', 'internet_usage_minutes',
+    'hotspot_access',
+])
+
+_student_cache = {}
+_student_cache_lock = threading.Lock()
+student_cache_stats = {'hits': 0, 'misses': 0, 'invalidations': 0}
+
+def invalidate_student_cache(student_id=None):
+    with _student_cache_lock:
+        if student_id is None:
+            _student_cache.clear()
+        else:
+            _student_cache.pop(student_id, None)
+        student_cache_stats['invalidations'] += 1
+
+def get_student_snapshot(student_id):
+    now = time.monotonic()
+    with _student_cache_lock:
+        cached = _student_cache.get(student_id)
+        if cached and cached[0] > now:
+            student_cache_stats['hits'] += 1
+            return cached[1]
+        student_cache_stats['misses'] += 1
+
+    student = Student.query.get(student_id)
+    if student is None:
+        return None
+    snapshot = StudentSnapshot(*(getattr(student, field) for field in StudentSnapshot._fields))
+    with _student_cache_lock:
+        _student_cache[student_id] = (now + app.config['STUDENT_CACHE_TTL'], snapshot)
+    return snapshot
+
+def current_student():
+    """Snapshot of the logged-in student, read at most once per request."""
+    if 'current_student' not in g:
+        g.current_student = get_student_snapshot(session['student_id'])
+    return g.current_student
+
+# Student columns the access allowlist is built from. Other writes, such as
+# last_login on every login, leave the snapshot alone.
+ALLOWLIST_ATTRIBUTES = ('hotspot_access', 'is_active', 'admission_number', 'department', 'year_of_study')
+
+@db_event.listens_for(orm.Session, 'after_flush')
+def _collect_stale_students(db_session, flush_context):
+    stale = db_session.info.setdefault('stale_students', set())
+    stale_devices = db_session.info.setdefault('stale_devices', set())
+    for obj in itertools.chain(db_session.new, db_session.dirty, db_session.deleted):
+        if isinstance(obj, Student):
+            stale.add(obj.id)
+            state = db.inspect(obj)
+            if obj in db_session.dirty and not any(state.attrs[name].history.has_changes()
+                                                   for name in ALLOWLIST_ATTRIBUTES):
+                continue
+            db_session.info['allowlist_stale'] = True
+        elif isinstance(obj, Device):
+            stale_devices.add(obj.mac_address)
+        elif isinstance(obj, HotspotConfig):
+            db_session.info['qrcode_stale'] = True
+
+@db_event.listens_for(orm.Session, 'after_commit')
+def _invalidate_stale_students(db_session):
+    stale = db_session.info.pop('stale_students', ())
+    for student_id in stale:
+        invalidate_student_cache(student_id)
+    if db_session.info.pop('allowlist_stale', False):
+        access_allowlist.invalidate()
+    device_resolver.invalidate(db_session.info.pop('stale_devices', ()))
+    if db_session.info.pop('qrcode_stale', False):
+        invalidate_qrcode_cache()
+
+@db_event.listens_for(orm.Session, 'after_rollback')
+def _forget_stale_students(db_session):
+    db_session.info.pop('stale_students', None)
+    db_session.info.pop('stale_devices', None)
+    db_session.info.pop('allowlist_stale', None)
+    db_session.info.pop('qrcode_stale', None)
+
+@app.route('/admin/cache_stats')
+def cache_stats():
+    if 'student_id' not in session:
+        return redirect(url_for('login'))
+
+    lookups = student_cache_stats['hits'] + student_cache_stats['misses']
+    return jsonify({
+        'student_cache': dict(
+            student_cache_stats,
+            entries=len(_student_cache),
+            hit_rate=round(student_cache_stats['hits'] / lookups, 4) if lookups else None,
+            ttl_seconds=app.config['STUDENT_CACHE_TTL'],
+        ),
+        'qrcode_cache': {'entries': len(_qrcode_cache)},
+    })
+
+# Queries behind the hot routes. Kept here so check-query-plans can EXPLAIN
+# exactly what the routes run.
+def recent_sessions_query(student_id, limit=10):
+    return HotspotSession.query.filter_by(student_id=student_id)\
+                               .order_by(HotspotSession.start_time.desc())\
+                               .limit(limit)
+
+def pending_request_query(student_id):
+    return HotspotRequest.query.filter_by(student_id=student_id, status='pending')
+
+def latest_request_query(student_id):
+    return HotspotRequest.query.filter_by(student_id=student_id)\
+                               .order_by(HotspotRequest.request_time.desc())
+
+def pending_requests_query():
+    return reporting_session().query(
+        HotspotRequest, Student
+    ).join(
+        Student, HotspotRequest.student_id == Student.id
+    ).filter(
+        HotspotRequest.status == 'pending'
+    )
+
+# Schema migrations. Each entry runs once, in order, and is recorded in
+# schema_version; a database that is already current costs one query at
+# startup. Migrations only ever add, and must be safe to re-run in case two
+# workers upgrade the same database at once.
+def sync_schema(conn):
+    """Create missing tables, nullable columns and indexes."""
+    db.metadata.create_all(conn)
+    inspector = db.inspect(conn)
+    for table in db.metadata.sorted_tables:
+        existing = {column['name'] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name not in existing and column.nullable:
+                column_type = column.type.compile(conn.dialect)
+                conn.exec_driver_sql(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}")
+    for table in db.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(conn, checkfirst=True)
+
+def create_student_search(conn):
+    """Full-text index over student names and contact details, kept in step
+    with the student table by triggers so ORM writes and bulk imports alike
+    stay searchable. Skipped if this SQLite build lacks FTS5."""
+    try:
+        conn.exec_driver_sql(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS student_fts USING fts5("
+            "admission_number, full_name, email, department, "
+            "content='student', content_rowid='id', prefix='1 2 3')"
+        )
+    except exc.OperationalError:
+        app.logger.warning("SQLite was built without FTS5; student search falls back to LIKE")
+        return
+    # Admission number matches rank first, then name, email, department.
+    conn.exec_driver_sql("INSERT INTO student_fts(student_fts, rank) VALUES ('rank', 'bm25(10.0, 5.0, 2.0, 1.0)')")
+    conn.exec_driver_sql("""
+        CREATE TRIGGER IF NOT EXISTS student_fts_insert AFTER INSERT ON student BEGIN
+            INSERT INTO student_fts(rowid, admission_number, full_name, email, department)
+            VALUES (new.id, new.admission_number, new.full_name, new.email, new.department);
+        END""")
+    conn.exec_driver_sql("""
+        CREATE TRIGGER IF NOT EXISTS student_fts_delete AFTER DELETE ON student BEGIN
+            INSERT INTO student_fts(student_fts, rowid, admission_number, full_name, email, department)
+            VALUES ('delete', old.id, old.admission_number, old.full_name, old.email, old.department);
+        END""")
+    # Only the indexed columns, so logins updating last_login don't touch the index.
+    conn.exec_driver_sql("""
+        CREATE TRIGGER IF NOT EXISTS student_fts_update
+        AFTER UPDATE OF admission_number, full_name, email, department ON student BEGIN
+            INSERT INTO student_fts(student_fts, rowid, admission_number, full_name, email, department)
+            VALUES ('delete', old.id, old.admission_number, old.full_name, old.email, old.department);
+            INSERT INTO student_fts(rowid, admission_number, full_name, email, department)
+            VALUES (new.id, new.admission_number, new.full_name, new.email, new.department);
+        END""")
+    conn.exec_driver_sql("INSERT INTO student_fts(student_fts) VALUES ('rebuild')")
+
+def index_session_archives(conn):
+    """Give archive tables made before it existed their start_time index."""
+    for month in archived_session_months(conn):
+        for index in session_archive_table(month).indexes:
+            index.create(conn, checkfirst=True)
+
+MIGRATIONS = [
+    (1, 'Tables, columns and indexes through device tracking and access schedules', sync_schema),
+    (2, 'Full-text student search', create_student_search),
+    (3, 'start_time index on session archive tables', index_session_archives),
+    (4, 'Last activity time on hotspot sessions', sync_schema),
+]
+
+def current_schema_version(conn):
+    if not db.inspect(conn).has_table(SchemaVersion.__tablename__):
+        return 0
+    return conn.execute(db.select(db.func.max(SchemaVersion.version))).scalar() or 0
+
+def stamp_schema_version(conn, version, description):
+    conn.execute(sqlite_insert(SchemaVersion).values(
+        version=version, description=description, applied_at=datetime.datetime.utcnow()
+    ).on_conflict_do_nothing())
+
+# Workers booting together wait this long for each other's migrations.
+app.config['MIGRATION_LOCK_TIMEOUT_MS'] = int(os.environ.get('MIGRATION_LOCK_TIMEOUT_MS', 60000))
+
+@contextlib.contextmanager
+def schema_lock(engine):
+    """A connection holding the database write lock until the block ends,
+    committing on success. pysqlite doesn't BEGIN before DDL, so without this
+    two workers could both find a table missing and both try to create it."""
+    with engine.connect().execution_options(isolation_level='AUTOCOMMIT') as conn:
+        conn.exec_driver_sql(f"PRAGMA busy_timeout = {app.config['MIGRATION_LOCK_TIMEOUT_MS']}")
+        try:
+            conn.exec_driver_sql("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.exec_driver_sql("ROLLBACK")
+                raise
+            conn.exec_driver_sql("COMMIT")
+        finally:
+            conn.exec_driver_sql(f"PRAGMA busy_timeout = {app.config['SQLITE_BUSY_TIMEOUT_MS']}")
+
+def upgrade_database(seed=None):
+    """Apply pending migrations without touching existing data; an empty
+    database runs them all. seed(conn), if given, runs under the same lock.
+    Returns the versions applied."""
+    with app.app_context():
+        with schema_lock(db.engine) as conn:
+            current = current_schema_version(conn)
+            pending = [migration for migration in MIGRATIONS if migration[0] > current]
+            for version, description, migrate in pending:
+                migrate(conn)
+            if pending:
+                SchemaVersion.__table__.create(conn, checkfirst=True)
+                for version, description, _ in pending:
+                    stamp_schema_version(conn, version, description)
+            if seed is not None:
+                seed(conn)
+        for bind_key, metadata in db.metadatas.items():
+            if bind_key is not None:
+                with schema_lock(db.engines[bind_key]) as conn:
+                    metadata.create_all(conn)
+    return [version for version, _, _ in pending]
+
+def explain_query_plan(query):
+    statement = query.statement.compile(db.engine)
+    params = tuple(statement.params[name] for name in statement.positiontup)
+    rows = db.session.connection().exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", params)
+    return [row[3] for row in rows]
+
+def full_scans(plan):
+    # "SCAN t" without an index walks the whole table; "SEARCH t USING INDEX"
+    # and "SCAN t USING ... INDEX" are fine.
+    return [step for step in plan if step.startswith('SCAN ') and ' USING ' not in step]
+
+@app.cli.command('upgrade-db')
+def upgrade_db_command():
+    """Apply pending schema migrations."""
+    applied = upgrade_database()
+    if applied:
+        click.echo(f"Applied migrations: {', '.join(map(str, applied))}")
+    click.echo(f"Database schema is at version {MIGRATIONS[-1][0]}")
+
+@app.cli.command('check-query-plans')
+def check_query_plans_command():
+    """Fail if a hot route's query falls back to a full table scan."""
+    checks = {
+        'profile: recent sessions': recent_sessions_query(1),
+        'request_hotspot: pending request': pending_request_query(1).limit(1),
+        'request_hotspot: latest request': latest_request_query(1).limit(1),
+        'hotspot_requests: pending queue': pending_requests_query(),
+    }
+    failed = False
+    for name, query in checks.items():
+        plan = explain_query_plan(query)
+        scans = full_scans(plan)
+        status = 'FULL SCAN' if scans else 'ok'
+        click.echo(f"{name}: {status} ({'; '.join(plan)})")
+        failed = failed or bool(scans)
+    if failed:
+        raise SystemExit(1)
+
+def seed_database(conn):
+    """Add the admin account, a sample student and the default hotspot config
+    to an empty database."""
+    if conn.execute(db.select(Student.id).limit(1)).first() is not None:
+        return
+    # Create admin account and sample student
+    conn.execute(db.insert(Student), [
+        {
+            'admission_number': "ADM001",
+            'full_name': "Admin User",
+            'email': "admin@school.edu",
+            'password_hash': hash_password("admin123"),
+            'department': "Administration",
+            'year_of_study': 0,
+            'hotspot_access': True,
+        },
+        {
+            'admission_number': "STD001",
+            'full_name': "John Doe",
+            'email': "student@school.edu",
+            'password_hash': hash_password("password123"),
+            'department': "Computer Science",
+            'year_of_study': 2,
+            'hotspot_access': False,
+        },
+    ])
+    # Create default hotspot config
+    conn.execute(db.insert(HotspotConfig))
+    print("Database initialized successfully")
+
+def initialize_database():
+    """Bring the schema up to date and seed an empty database. Existing data
+    is never touched, so this runs on every start."""
+    try:
+        upgrade_database(seed=seed_database)
+    except Exception as e:
+        print(f"Error initializing database: {str(e)}")
+        raise
+
+# HTML Generation Functions
+STYLESHEET = """
+body {
+    font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
+    line-height: 1.6;
+    margin: 0;
+    padding: 0;
+    background-color: #f4f4f4;
+    color: #333;
+}
+.container {
+    width: 80%;
+    margin: auto;
+    overflow: hidden;
+    padding: 20px;
+}
+header {
+    background: #35424a;
+    color: white;
+    padding: 20px 0;
+    min-height: 70px;
+    border-bottom: #e8491d 3px solid;
+}
+header a {
+    color: #ffffff;
+    text-decoration: none;
+    text-transform: uppercase;
+    font-size: 16px;
+}
+header ul {
+    padding: 0;
+    list-style: none;
+}
+header li {
+    display: inline;
+    padding: 0 20px 0 20px;
+}
+.alert {
+    padding: 10px;
+    margin: 10px 0;
+    border-radius: 5px;
+}
+.alert-success {
+    background-color: #d4edda;
+    color: #155724;
+}
+.alert-danger {
+    background-color: #f8d7da;
+    color: #721c24;
+}
+.alert-info {
+    background-color: #d1ecf1;
+    color: #0c5460;
+}
+form {
+    background: #ffffff;
+    padding: 20px;
+    border-radius: 5px;
+    box-shadow: 0 0 10px rgba(0,0,0,0.1);
+}
+form label {
+    display: block;
+    margin: 10px 0 5px;
+}
+form input[type="text"],
+form input[type="password"],
+form input[type="email"],
+form input[type="number"],
+form select {
+    width: 100%;
+    padding: 10px;
+    border: 1px solid #ddd;
+    border-radius: 5px;
+    margin-bottom: 10px;
+}
+form button {
+    display: inline-block;
+    background: #e8491d;
+    color: #fff;
+    padding: 10px 20px;
+    border: none;
+    border-radius: 5px;
+    cursor: pointer;
+}
+form button:hover {
+    background: #35424a;
+}
+table {
+    width: 100%;
+    border-collapse: collapse;
+    margin: 20px 0;
+}
+table, th, td {
+    border: 1px solid #ddd;
+}
+th, td {
+    padding: 12px;
+    text-align: left;
+}
+th {
+    background-color: #35424a;
+    color: white;
+}
+tr:nth-child(even) {
+    background-color: #f2f2f2;
+}
+.internet-frame {
+    width: 100%;
+    height: 600px;
+    border: 1px solid #ddd;
+    border-radius: 5px;
+    margin: 20px 0;
+}
+.nav-links {
+    margin: 20px 0;
+}
+.nav-links a {
+    margin-right: 15px;
+    color: #e8491d;
+    text-decoration: none;
+}
+.nav-links a:hover {
+    text-decoration: underline;
+}
+.button {
+    display: inline-block;
+    background: #e8491d;
+    color: white;
+    padding: 10px 20px;
+    text-decoration: none;
+    border-radius: 5px;
+    margin-top: 20px;
+}
+.button:hover {
+    background: #35424a;
+}
+.student-info {
+    background: white;
+    padding: 20px;
+    border-radius: 5px;
+    box-shadow: 0 0 10px rgba(0,0,0,0.1);
+    margin-bottom: 20px;
+}
+.personal-info, .internet-usage {
+    background: white;
+    padding: 20px;
+    border-radius: 5px;
+    box-shadow: 0 0 10px rgba(0,0,0,0.1);
+    margin-bottom: 20px;
+}
+.qr-code {
+    text-align: center;
+    margin: 20px 0;
+}
+.qr-code img {
+    max-width: 200px;
+    height: auto;
+}
+"""
+
+# The stylesheet is served from a content-hashed URL so browsers can cache it
+# for good; any edit to STYLESHEET produces a new URL.
+STYLESHEET_ETAG = hashlib.sha256(STYLESHEET.encode('utf-8')).hexdigest()
+STYLESHEET_URL = f"/assets/style.{STYLESHEET_ETAG[:16]}.css"
+
+@app.route('/assets/style.<fingerprint>.css')
+def stylesheet(fingerprint):
+    if fingerprint != STYLESHEET_ETAG[:16]:
+        abort(404)
+    response = make_response(STYLESHEET)
+    response.mimetype = 'text/css'
+    response.set_etag(STYLESHEET_ETAG)
+    response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+    return response.make_conditional(request)
+
+def _build_page_shell(is_logged_in):
+    nav_links = """
+    <li><a href="/">Home</a></li>
+    """ + ("""
+    <li><a href="/dashboard">Dashboard</a></li>
+    <li><a href="/profile">Profile</a></li>
+    <li><a href="/hotspot">Hotspot</a></li>
+    <li><a href="/request_hotspot">Request Hotspot</a></li>
+    <li><a href="/connect_hotspot">Connect Instructions</a></li>
+    <li><a href="/logout">Logout</a></li>
+    """ if is_logged_in else """
+    <li><a href="/login">Login</a></li>
+    """)
+
+    head = """
+    <!DOCTYPE html>
+    <html>
+    <head>
+        <title>"""
+    body = f"""</title>
+        <link rel="stylesheet" href="{STYLESHEET_URL}">
+    </head>
+    <body>
+        <header>
+            <div class="container">
+                <h1>Student Hotspot Access Portal</h1>
+                <nav>
+                    <ul>
+                        {nav_links}
+                    </ul>
+                </nav>
+            </div>
+        </header>
+        
+        <div class="container">
+            """
+    tail = """
+        </div>
+    </body>
+    </html>
+    """
+    return head, body, tail
+
+# Header/nav/footer for the logged-out and logged-in variants, built once.
+PAGE_SHELLS = {
+    False: _build_page_shell(False),
+    True: _build_page_shell(True),
+}
+
+def generate_html(title, content, messages=None, is_logged_in=False):
+    head, body, tail = PAGE_SHELLS[is_logged_in]
+
+    message_html = ""
+    if messages:
+        message_html = "".join(
+            f'<div class="alert alert-{category}">{message}</div>'
+            for category, message in messages
+        )
+
+    return "".join((head, title, body, message_html, "\n            ", content, tail))
+
+def generate_html_stream(title, chunks, messages=None, is_logged_in=False):
+    """Like generate_html, but yields the page piece by piece around an
+    iterable of content chunks so large pages never sit in memory whole."""
+    head, body, tail = PAGE_SHELLS[is_logged_in]
+    yield "".join((head, title, body))
+    if messages:
+        yield "".join(
+            f'<div class="alert alert-{category}">{message}</div>'
+            for category, message in messages
+        )
+    yield "\n            "
+    for chunk in chunks:
+        yield chunk
+    yield tail
+
+# Routes
+@app.route('/')
+def landing_page():
+    content = """
+    <h2>Welcome to Student Hotspot Portal</h2>
+    <p>Please login to access the hotspot and your student details</p>
+    <a href="/login" class="button">Login</a>
+    """
+    messages = get_flashed_messages(with_categories=True)
+    return generate_html("Welcome", content, messages)
+
+@app.route('/login', methods=['GET', 'POST'])
+def login():
+    if request.method == 'POST':
+        admission_number = request.form['admission_number']
+        password = request.form['password']
+        
+        student = Student.query.filter_by(admission_number=admission_number).first()
+        
+        if student and student.check_password(password):
+            session.regenerate()
+            session['student_id'] = student.id
+            session['admission_number'] = student.admission_number
+            student.last_login = datetime.datetime.utcnow()
+            student.rehash_password_if_needed(password)
+
+            # Captive portals pass the client's MAC along with the redirect.
+            device = register_device(student.id, request.args.get('mac') or request.form.get('mac'))
+            if device:
+                session['device_id'] = device.id
+            closed = access_schedule.is_closed(student.department, student.year_of_study)
+            if not closed:
+                # One transaction for the login writes: flush to get the session
+                # id, then commit everything together.
+                new_session = HotspotSession(student_id=student.id, device_id=device.id if device else None)
+                db.session.add(new_session)
+                db.session.flush()
+                session['hotspot_session_id'] = new_session.id
+            db.session.commit()
+            
+            metrics.count_login(True)
+            flash('Login successful!', 'success')
+            if closed:
+                flash('The hotspot is closed for your class at this time', 'warning')
+            return redirect(url_for('dashboard'))
+        else:
+            metrics.count_login(False)
+            flash('Invalid admission number or password', 'danger')
+    
+    content = f"""
+    <h2>Student Login</h2>
+    <form method="POST">
+        <label for="admission_number">Admission Number:</label>
+        <input type="text" id="admission_number" name="admission_number" value="{escape(request.args.get('admission_number', ''))}" required>
+        
+        <label for="password">Password:</label>
+        <input type="password" id="password" name="password" required>
+        
+        <button type="submit">Login</button>
+    </form>
+    """
+    messages = get_flashed_messages(with_categories=True)
+    return generate_html("Login", content, messages)
+
+@app.route('/logout')
+def logout():
+    if 'hotspot_session_id' in session:
+        hotspot_session = HotspotSession.query.get(session['hotspot_session_id'])
+        if hotspot_session and hotspot_session.end_time is None:
+            end_time = datetime.datetime.utcnow()
+            # Only close it if the reaper hasn't already; it credited the
+            # minutes when it did.
+            closed = db.session.execute(
+                db.update(HotspotSession)
+                .where(HotspotSession.id == hotspot_session.id, HotspotSession.end_time.is_(None))
+                .values(end_time=end_time),
+                execution_options={'synchronize_session': False}
+            ).rowcount
+            if closed:
+                duration = session_minutes(hotspot_session.start_time, end_time)
+                student = Student.query.get(session['student_id'])
+                db.session.execute(
+                    db.update(Student)
+                    .where(Student.id == student.id)
+                    .values(internet_usage_minutes=db.func.coalesce(Student.internet_usage_minutes, 0) + duration)
+                )
+                record_session_usage([(student.id, student.department, hotspot_session.start_time,
+                                       duration, hotspot_session.data_used_mb)])
+            db.session.commit()
+
+    if 'student_id' in session:
+        invalidate_student_cache(session['student_id'])
+    session.clear()
+    session.regenerate()
+    flash('You have been logged out', 'info')
+    return redirect(url_for('landing_page'))
+
+@app.route('/dashboard')
+def dashboard():
+    if 'student_id' not in session:
+        return redirect(url_for('login'))
+    
+    student = current_student()
+    
+    last_login = student.last_login.strftime('%Y-%m-%d %H:%M:%S') if student.last_login else 'Never'
+    
+    content = f"""
+    <h2>Welcome, {student.full_name}</h2>
+    <div class="student-info">
+        <p><strong>Admission Number:</strong> {student.admission_number}</p>
+        <p><strong>Department:</strong> {student.department}</p>
+        <p><strong>Year of Study:</strong> {student.year_of_study}</p>
+        <p><strong>Last Login:</strong> {last_login}</p>
+        <p><strong>Hotspot Access:</strong> {'Approved' if student.hotspot_access else 'Not Approved'}</p>
+        {quota_summary_html(student.id)}
+    </div>
+    
+    <div class="nav-links">
+        <h3>Quick Links</h3>
+        <a href="/profile">View Profile</a>
+        <a href="/request_hotspot">Request Hotspot Access</a>
+        <a href="/connect_hotspot">Connection Instructions</a>
+        <a href="/hotspot">Access Hotspot</a>
+        <a href="/logout">Logout</a>
+    </div>
+    """
+    messages = get_flashed_messages(with_categories=True)
+    return generate_html("Dashboard", content, messages, is_logged_in=True)
+
+@app.route('/profile')
+def profile():
+    if 'student_id' not in session:
+        return redirect(url_for('login'))
+    
+    student = current_student()
+    sessions = recent_sessions_query(student.id).all()
+    
+    sessions_html = ""
+    for sess in sessions:
+        if sess.end_time:
+            duration_min = (sess.end_time - sess.start_time).seconds // 60
+            duration = f'Duration: {duration_min} minutes'
+        else:
+            duration = 'Active session'
+        
+        end_time = sess.end_time.strftime('%Y-%m-%d %H:%M:%S') if sess.end_time else 'Active'
+        sessions_html += f"""
+        <tr>
+            <td>{sess.start_time.strftime('%Y-%m-%d %H:%M:%S')}</td>
+            <td>{end_time}</td>
+            <td>{duration}</td>
+        </tr>
+        """
+    
+    content = f"""
+    <h2>Student Profile</h2>
+    <div class="personal-info">
+        <h3>Personal Information</h3>
+        <p><strong>Admission Number:</strong> {student.admission_number}</p>
+        <p><strong>Full Name:</strong> {student.full_name}</p>
+        <p><strong>Email:</strong> {student.email}</p>
+        <p><strong>Department:</strong> {student.department}</p>
+        <p><strong>Year of Study:</strong> {student.year_of_study}</p>
+        <p><strong>Hotspot Access:</strong> {'Approved' if student.hotspot_access else 'Not Approved'}</p>
+    </div>
+    
+    <div class="internet-usage">
+        <h3>Hotspot Usage</h3>
+        <p><strong>Total Minutes Used:</strong> {student.internet_usage_minutes}</p>
+        
+        <h4>Recent Sessions</h4>
+        <table>
+            <thead>
+                <tr>
+                    <th>Start Time</th>
+                    <th>End Time</th>
+                    <th>Duration</th>
+                </tr>
+            </thead>
+            <tbody>
+                {sessions_html}
+            </tbody>
+        </table>
+    </div>
+    
+    <div class="nav-links">
+        <a href="/devices">My Devices</a>
+        <a href="/dashboard">Back to Dashboard</a>
+    </div>
+    """
+    messages = get_flashed_messages(with_categories=True)
+    return generate_html("Profile", content, messages, is_logged_in=True)
+
+@app.route('/request_hotspot', methods=['GET', 'POST'])
+def request_hotspot():
+    if 'student_id' not in session:
+        return redirect(url_for('login'))
+
+    student = current_student()
+    
+    if student.hotspot_access:
+        flash('You already have hotspot access', 'info')
+        return redirect(url_for('dashboard'))
+    
+    if request.method == 'POST':
+        existing_request = pending_request_query(student.id).first()
+        
+        if existing_request:
+            flash('You already have a pending hotspot request', 'warning')
+        else:
+            new_request = HotspotRequest(student_id=student.id)
+            db.session.add(new_request)
+            db.session.commit()
+            request_events.publish('created', {
+                'id': new_request.id,
+                'admission_number': student.admission_number,
+                'full_name': student.full_name,
+                'department': student.department,
+                'request_time': new_request.request_time.strftime('%Y-%m-%d %H:%M'),
+            })
+            flash('Hotspot access request submitted for admin approval', 'success')
+        
+        return redirect(url_for('dashboard'))
+
+    current_request = latest_request_query(student.id).first()
+
+    status_message = "No active hotspot access"
+    if current_request:
+        if current_request.status == 'approved':
+            status_message = f"Hotspot Access Approved (on {current_request.approval_time.strftime('%Y-%m-%d')})"
+        elif current_request.status == 'pending':
+            status_message = "Hotspot Access Pending Approval"
+        else:
+            status_message = "Last request was rejected"
+
+    content = f"""
+    <h2>Hotspot Access Request</h2>
+    <div class="student-info">
+        <p><strong>Current Status:</strong> {status_message}</p>
+        <p>Your admission number: {student.admission_number}</p>
+    </div>
+    
+    <form method="POST">
+        <p>Click below to request hotspot access</p>
+        <button type="submit">Request Hotspot Access</button>
+    </form>
+    
+    <div class="nav-links">
+        <a href="/dashboard">Back to Dashboard</a>
+    </div>
+    """
+    return generate_html("Hotspot Access", content, is_logged_in=True)
+
+@app.route('/connect_hotspot')
+def connect_hotspot():
+    if 'student_id' not in session:
+        return redirect(url_for('login'))
+    
+    student = current_student()
+    if not student.hotspot_access:
+        flash('You need approved hotspot access', 'danger')
+        return redirect(url_for('request_hotspot'))
+    
+    config = HotspotConfig.query.first()
+    if not config:
+        config = HotspotConfig()
+        db.session.add(config)
+        db.session.commit()
+    
+    content = f"""
+    <h2>Connect to School Hotspot</h2>
+    <div class="student-info">
+        <h3>Connection Instructions</h3>
+        <ol>
+            <li>Go to your device's WiFi settings</li>
+            <li>Look for network: <strong>{config.ssid}</strong></li>
+            <li>Connect using password: <strong>{config.password}</strong></li>
+            <li>Open any browser and you'll be redirected to login</li>
+        </ol>
+        
+        <div class="qr-code">
+            <h4>Quick Connect QR Code</h4>
+            <img src="/qrcode" alt="Hotspot QR Code">
+            <p>Scan this code with your phone camera to connect automatically</p>
+        </div>
+    </div>
+    """
+    return generate_html("Hotspot Connection", content, is_logged_in=True)
+
+# Rendered QR codes keyed by (ssid, password, scale, kind), plus the config
+# they were built from. Both are dropped when a transaction that changed a
+# HotspotConfig row commits here; the config is also re-read every
+# QRCODE_CONFIG_TTL_SECONDS to pick up changes made by other processes.
+app.config['QRCODE_CONFIG_TTL_SECONDS'] = float(os.environ.get('QRCODE_CONFIG_TTL_SECONDS', 30))
+QRCODE_SCALE = 6
+QRCODE_MIMETYPES = {'png': 'image/png', 'svg': 'image/svg+xml'}
+_qrcode_cache = {}
+# (ssid, password, time loaded)
+_qrcode_config = None
+
+def invalidate_qrcode_cache():
+    global _qrcode_config
+    _qrcode_config = None
+    _qrcode_cache.clear()
+
+def get_qrcode_config():
+    global _qrcode_config
+    cached = _qrcode_config
+    if cached is None or time.monotonic() - cached[2] > app.config['QRCODE_CONFIG_TTL_SECONDS']:
+        config = HotspotConfig.query.first()
+        if not config:
+            config = HotspotConfig()
+            db.session.add(config)
+            db.session.commit()
+        if cached is not None and cached[:2] != (config.ssid, config.password):
+            _qrcode_cache.clear()
+        cached = _qrcode_config = (config.ssid, config.password, time.monotonic())
+    return cached[:2]
+
+def render_qrcode(ssid, password, scale, kind):
+    key = (ssid, password, scale, kind)
+    cached = _qrcode_cache.get(key)
+    if cached is None:
+        # Imported here so workers that never draw a QR code don't pay for it.
+        import segno
+        wifi_config = f"WIFI:T:WPA;S:{ssid};P:{password};;"
+        qrcode = segno.make(wifi_config, micro=False)
+        buffer = BytesIO()
+        if kind == 'svg':
+            qrcode.save(buffer, kind=kind, scale=scale, xmldecl=False,
+                        svgclass=None, lineclass=None, nl=False)
+        else:
+            qrcode.save(buffer, kind=kind, scale=scale)
+        data = buffer.getvalue()
+        cached = (data, hashlib.sha256(data).hexdigest())
+        _qrcode_cache[key] = cached
+    return cached
+
+@app.route('/qrcode')
+def generate_qrcode():
+    kind = request.args.get('format')
+    if kind not in QRCODE_MIMETYPES:
+        # PNG is the smaller payload at this scale, so only fall back to SVG
+        # for clients that prefer it outright.
+        accept = request.accept_mimetypes
+        if accept.quality(QRCODE_MIMETYPES['svg']) > accept.quality(QRCODE_MIMETYPES['png']):
+            kind = 'svg'
+        else:
+            kind = 'png'
+
+    ssid, password = get_qrcode_config()
+    data, etag = render_qrcode(ssid, password, QRCODE_SCALE, kind)
+
+    response = make_response(data)
+    response.mimetype = QRCODE_MIMETYPES[kind]
+    response.set_etag(etag)
+    # The code embeds the hotspot password, so keep it out of shared caches
+    # and make clients revalidate so a changed config is picked up.
+    response.headers['Cache-Control'] = 'private, no-cache'
+    response.vary.add('Accept')
+    return response.make_conditional(request)
+
+@app.route('/hotspot')
+def hotspot_access():
+    if 'student_id' not in session:
+        return redirect(url_for('login'))
+
+    student = current_student()
+    if not student.hotspot_access:
+        flash('You need approved hotspot access to use this feature', 'danger')
+        return redirect(url_for('request_hotspot'))
+
+    if quota_engine.is_over_quota(student.id):
+        flash('You have used up your hotspot data allowance for now', 'danger')
+        return redirect(url_for('dashboard'))
+
+    if access_schedule.is_closed(student.department, student.year_of_study):
+        flash('The hotspot is closed for your class at this time', 'danger')
+        return redirect(url_for('dashboard'))
+
+    # Start new hotspot session if not already active. The reaper may have
+    # closed the one from login while the student stayed online.
+    hotspot_session_id = session.get('hotspot_session_id')
+    if hotspot_session_id is not None and db.session.execute(
+        db.select(HotspotSession.id)
+        .where(HotspotSession.id == hotspot_session_id, HotspotSession.end_time.is_(None))
+    ).first() is None:
+        session.pop('hotspot_session_id')
+    if 'hotspot_session_id' not in session:
+        new_session = HotspotSession(student_id=student.id, device_id=session.get('device_id'))
+        db.session.add(new_session)
+        db.session.commit()
+        session['hotspot_session_id'] = new_session.id
+
+    content = f"""
+    <h2>Hotspot Access Portal</h2>
+    <div class="student-info">
+        <p>Welcome, {student.full_name}</p>
+        <p>You are now connected to the school hotspot</p>
+    </div>
+    
+    <div class="internet-frame">
+        <iframe src="https://example.com" width="100%" height="100%" frameborder="0"></iframe>
+    </div>
+    
+    <div class="nav-links">
+        <a href="/logout">Disconnect and Logout</a>
+    </div>
+    """
+    return generate_html("Hotspot Access", content, is_logged_in=True)
+
+@app.route('/admin/hotspot_requests')
+def hotspot_requests():
+    if 'student_id' not in session:
+        return redirect(url_for('login'))
+
+    # Taken before the query so no change can fall between the list and the feed.
+    last_event_id = request_events.last_id
+    pending_requests = pending_requests_query().all()
+
+    requests_html = ""
+    for request, student in pending_requests:
+        requests_html += f"""
+        <tr id="request-{request.id}">
+            <td><input type="checkbox" name="request_ids" value="{request.id}"></td>
+            <td>{student.admission_number}</td>
+            <td>{student.full_name}</td>
+            <td>{student.department}</td>
+            <td>{request.request_time.strftime('%Y-%m-%d %H:%M')}</td>
+            <td>
+                <a href="/admin/approve_hotspot/{request.id}">Approve</a> | 
+                <a href="/admin/reject_hotspot/{request.id}">Reject</a>
+            </td>
+        </tr>
+        """
+
+    content = f"""
+    <h2>Pending Hotspot Requests</h2>
+    <form method="POST" action="/admin/hotspot_requests/bulk">
+        <h3>Bulk Action by Class</h3>
+        <label for="department">Department:</label>
+        <input type="text" id="department" name="department">
+        
+        <label for="year_of_study">Year of Study:</label>
+        <input type="number" id="year_of_study" name="year_of_study" min="0" max="6">
+        
+        <button type="submit" name="action" value="approve">Approve All Pending</button>
+        <button type="submit" name="action" value="reject">Reject All Pending</button>
+    </form>
+    
+    <form method="POST" action="/admin/hotspot_requests/bulk">
+    <table>
+        <thead>
+            <tr>
+                <th></th>
+                <th>Admission No.</th>
+                <th>Student Name</th>
+                <th>Department</th>
+                <th>Request Time</th>
+                <th>Actions</th>
+            </tr>
+        </thead>
+        <tbody>
+            {requests_html}
+        </tbody>
+    </table>
+        <button type="submit" name="action" value="approve">Approve Selected</button>
+        <button type="submit" name="action" value="reject">Reject Selected</button>
+    </form>
+    <div class="nav-links">
+        <a href="/admin">Back to Admin Dashboard</a>
+    </div>
+    <script>
+    (function () {{
+        var rows = document.querySelector('tbody');
+        var events = new EventSource('/admin/hotspot_requests/events?last_event_id={last_event_id}');
+        events.addEventListener('created', function (event) {{
+            var data = JSON.parse(event.data);
+            var row = document.createElement('tr');
+            row.id = 'request-' + data.id;
+            var box = document.createElement('input');
+            box.type = 'checkbox';
+            box.name = 'request_ids';
+            box.value = data.id;
+            row.insertCell().appendChild(box);
+            [data.admission_number, data.full_name, data.department, data.request_time].forEach(function (text) {{
+                row.insertCell().textContent = text;
+            }});
+            row.insertCell().innerHTML = '<a href="/admin/approve_hotspot/' + data.id + '">Approve</a> | ' +
+                '<a href="/admin/reject_hotspot/' + data.id + '">Reject</a>';
+            rows.appendChild(row);
+        }});
+        ['approved', 'rejected'].forEach(function (kind) {{
+            events.addEventListener(kind, function (event) {{
+                JSON.parse(event.data).ids.forEach(function (id) {{
+                    var row = document.getElementById('request-' + id);
+                    if (row) row.remove();
+                }});
+            }});
+        }});
+        // Too far behind to catch up from deltas: start over.
+        events.addEventListener('reset', function () {{ location.reload(); }});
+    }})();
+    </script>
+    """
+    messages = get_flashed_messages(with_categories=True)
+    return generate_html("Hotspot Requests", content, messages, is_logged_in=True)
+
+def bulk_update_hotspot_requests(action, admin_id, request_ids=None, department=None, year_of_study=None):
+    """Approve or reject pending requests matching an explicit id list and/or
+    a department/year filter, in one transaction. Returns counts."""
+    conditions = [HotspotRequest.status == 'pending']
+    if request_ids is not None:
+        conditions.append(HotspotRequest.id.in_(request_ids))
+    if department or year_of_study is not None:
+        students = db.select(Student.id)
+        if department:
+            students = students.where(Student.department == department)
+        if year_of_study is not None:
+            students = students.where(Student.year_of_study == year_of_study)
+        conditions.append(HotspotRequest.student_id.in_(students))
+    if len(conditions) == 1:
+        # Refuse to touch every pending request without an explicit filter.
+        return {'requests': 0, 'students': 0}
+    matching = db.and_(*conditions)
+
+    granted = 0
+    if action == 'approve':
+        # Grant access before the status flip, while the rows still match.
+        granted = db.session.execute(
+            db.update(Student)
+            .where(Student.id.in_(db.select(HotspotRequest.student_id).where(matching)))
+            .values(hotspot_access=True)
+        ).rowcount
+        values = {'status': 'approved', 'approved_by': admin_id,
+                  'approval_time': datetime.datetime.utcnow()}
+    else:
+        values = {'status': 'rejected'}
+    request_ids = db.session.execute(db.select(HotspotRequest.id).where(matching)).scalars().all()
+    updated = db.session.execute(
+        db.update(HotspotRequest).where(matching).values(**values),
+        execution_options={'synchronize_session': False}
+    ).rowcount
+    db.session.commit()
+
+    if granted:
+        # Set-based updates skip the ORM events that normally evict these.
+        invalidate_student_cache()
+        access_allowlist.invalidate()
+    if request_ids:
+        request_events.publish('approved' if action == 'approve' else 'rejected', {'ids': request_ids})
+    return {'requests': updated, 'students': granted}
+
+@app.route('/admin/hotspot_requests/bulk', methods=['POST'])
+def bulk_hotspot_requests():
+    if 'student_id' not in session:
+        return redirect(url_for('login'))
+
+    if request.is_json:
+        data = request.get_json(silent=True)
+        if data is None:
+            return jsonify({'error': 'invalid JSON body'}), 400
+        if not isinstance(data, dict):
+            return jsonify({'error': 'expected a JSON object'}), 400
+        action = data.get('action')
+        request_ids = data.get('request_ids')
+        department = data.get('department')
+        year_of_study = data.get('year_of_study')
+        if request_ids is not None and not (
+            isinstance(request_ids, list)
+            and all(isinstance(request_id, int) and not isinstance(request_id, bool) for request_id in request_ids)
+        ):
+            return jsonify({'error': 'request_ids must be a list of integers'}), 400
+        if department is not None and not isinstance(department, str):
+            return jsonify({'error': 'department must be a string'}), 400
+        if year_of_study is not None and (isinstance(year_of_study, bool) or not isinstance(year_of_study, int)):
+            return jsonify({'error': 'year_of_study must be an integer'}), 400
+    else:
+        action = request.form.get('action')
+        request_ids = request.form.getlist('request_ids', type=int) or None
+        department = request.form.get('department', '').strip() or None
+        year_of_study = request.form.get('year_of_study', type=int)
+
+    if action not in ('approve', 'reject'):
+        if request.is_json:
+            return jsonify({'error': 'action must be approve or reject'}), 400
+        flash('Unknown bulk action', 'danger')
+        return redirect(url_for('hotspot_requests'))
+
+    counts = bulk_update_hotspot_requests(action, session['student_id'], request_ids,
+                                          department, year_of_study)
+    if request.is_json:
+        return jsonify(dict(counts, action=action))
+
+    if action == 'approve':
+        flash(f"Approved {counts['requests']} requests ({counts['students']} students granted access)", 'success')
+    else:
+        flash(f"Rejected {counts['requests']} requests", 'warning')
+    return redirect(url_for('hotspot_requests'))
+
+@app.route('/admin/approve_hotspot/<int:request_id>')
+def approve_hotspot(request_id):
+    if 'student_id' not in session:
+        return redirect(url_for('login'))
+
+    request = HotspotRequest.query.get(request_id)
+    if request:
+        request.status = 'approved'
+        request.approved_by = session['student_id']
+        request.approval_time = datetime.datetime.utcnow()
+        
+        # Grant hotspot access to student
+        student = Student.query.get(request.student_id)
+        student.hotspot_access = True
+        
+        db.session.commit()
+        invalidate_student_cache(student.id)
+        request_events.publish('approved', {'ids': [request_id]})
+        flash('Hotspot access approved', 'success')
+    return redirect(url_for('hotspot_requests'))
+
+@app.route('/admin/reject_hotspot/<int:request_id>')
+def reject_hotspot(request_id):
+    if 'student_id' not in session:
+        return redirect(url_for('login'))
+
+    request = HotspotRequest.query.get(request_id)
+    if request:
+        request.status = 'rejected'
+        db.session.commit()
+        request_events.publish('rejected', {'ids': [request_id]})
+        flash('Hotspot access rejected', 'warning')
+    return redirect(url_for('hotspot_requests'))
+
+@app.route('/admin')
+def admin_home():
+    if 'student_id' not in session:
+        return redirect(url_for('login'))
+    
+    return generate_html("Admin Dashboard", """
+    <h2>Admin Dashboard</h2>
+    <div class="nav-links">
+        <a href="/admin/students">Manage Students</a>
+        <a href="/admin/add_student">Add New Student</a>
+        <a href="/admin/import_students">Import Students from CSV</a>
+        <a href="/admin/hotspot_requests">Manage Hotspot Requests</a>
+        <a href="/admin/usage">Usage Reports</a>
+        <a href="/admin/quotas">Data Quotas</a>
+        <a href="/admin/schedules">Access Schedules</a>
+        <a href="/admin/export/sessions">Export Session History</a>
+        <a href="/admin/vouchers">Print Wi-Fi Vouchers</a>
+        <a href="/dashboard">Back to Dashboard</a>
+    </div>
+    """, is_logged_in=True)
+
+STUDENT_LIST_ORDERS = {
+    'id': Student.id,
+    'admission_number': Student.admission_number,
+}
+
+def parse_student_list_args(args):
+    page_size = args.get('page_size', app.config['ADMIN_STUDENTS_PAGE_SIZE'], type=int)
+    page_size = max(1, min(page_size, app.config['ADMIN_STUDENTS_MAX_PAGE_SIZE']))
+
+    order = args.get('order', 'id')
+    if order not in STUDENT_LIST_ORDERS:
+        order = 'id'
+
+    after = args.get('after') or None
+    if after is not None and order == 'id':
+        after = args.get('after', type=int)
+
+    hotspot_access = args.get('hotspot_access', '')
+    if hotspot_access not in ('yes', 'no'):
+        hotspot_access = ''
+
+    return {
+        'page_size': page_size,
+        'order': order,
+        'after': after,
+        'department': args.get('department', '').strip(),
+        'year': args.get('year', type=int),
+        'hotspot_access': hotspot_access,
+    }
+
+def student_list_query(filters):
+    order_column = STUDENT_LIST_ORDERS[filters['order']]
+    query = reporting_session().query(
+        Student.id,
+        Student.admission_number,
+        Student.full_name,
+        Student.email,
+        Student.department,
+        Student.year_of_study,
+        Student.internet_usage_minutes,
+        Student.hotspot_access,
+    )
+    if filters['department']:
+        query = query.filter(Student.department == filters['department'])
+    if filters['year'] is not None:
+        query = query.filter(Student.year_of_study == filters['year'])
+    if filters['hotspot_access']:
+        query = query.filter(Student.hotspot_access == (filters['hotspot_access'] == 'yes'))
+    # Keyset pagination: seek past the last row of the previous page instead
+    # of using OFFSET, so every page costs the same regardless of depth.
+    if filters['after'] is not None:
+        query = query.filter(order_column > filters['after'])
+    return query.order_by(order_column).limit(filters['page_size'] + 1)
+
+@app.route('/admin/students')
+def admin_students():
+    if 'student_id' not in session:
+        return redirect(url_for('login'))
+
+    filters = parse_student_list_args(request.args)
+    rows = student_list_query(filters).yield_per(200)
+
+    def generate_rows():
+        last_key = None
+        has_more = False
+        for count, student in enumerate(rows):
+            if count == filters['page_size']:
+                has_more = True
+                break
+            last_key = getattr(student, filters['order'])
+            yield f"""
+        <tr>
+            <td>{student.admission_number}</td>
+            <td>{student.full_name}</td>
+            <td>{student.email}</td>
+            <td>{student.department}</td>
+            <td>{student.year_of_study}</td>
+            <td>{student.internet_usage_minutes} mins</td>
+            <td>{'Yes' if student.hotspot_access else 'No'}</td>
+            <td>
+                <a href="/admin/edit_student/{student.id}">Edit</a> | 
+                <a href="/admin/delete_student/{student.id}">Delete</a>
+            </td>
+        </tr>
+        """
+
+        yield """
+        </tbody>
+    </table>
+    <div class="nav-links">
+        <a href="/admin/students">First Page</a>
+        """
+        if has_more:
+            next_args = {
+                'page_size': filters['page_size'],
+                'order': filters['order'],
+                'after': last_key,
+            }
+            for key in ('department', 'year', 'hotspot_access'):
+                if filters[key] not in ('', None):
+                    next_args[key] = filters[key]
+            yield f'<a href="/admin/students?{escape(urlencode(next_args))}">Next Page</a>'
+        yield """
+    </div>
+    """
+
+    header = f"""
+    <h2>Student Management</h2>
+    <div class="nav-links">
+        <a href="/admin/students/search">Search Students</a>
+        <a href="/admin/add_student">Add New Student</a>
+        <a href="/admin">Back to Admin Dashboard</a>
+    </div>
+    
+    <form method="GET">
+        <label for="department">Department:</label>
+        <input type="text" id="department" name="department" value="{escape(filters['department'])}">
+        
+        <label for="year">Year of Study:</label>
+        <input type="number" id="year" name="year" min="0" max="6" value="{filters['year'] if filters['year'] is not None else ''}">
+        
+        <label for="hotspot_access">Hotspot Access:</label>
+        <select id="hotspot_access" name="hotspot_access">
+            <option value="">Any</option>
+            <option value="yes"{' selected' if filters['hotspot_access'] == 'yes' else ''}>Yes</option>
+            <option value="no"{' selected' if filters['hotspot_access'] == 'no' else ''}>No</option>
+        </select>
+        
+        <label for="order">Sort By:</label>
+        <select id="order" name="order">
+            <option value="id"{' selected' if filters['order'] == 'id' else ''}>Date Added</option>
+            <option value="admission_number"{' selected' if filters['order'] == 'admission_number' else ''}>Admission Number</option>
+        </select>
+        
+        <input type="hidden" name="page_size" value="{filters['page_size']}">
+        <button type="submit">Filter</button>
+    </form>
+    
+    <table>
+        <thead>
+            <tr>
+                <th>Admission No.</th>
+                <th>Full Name</th>
+                <th>Email</th>
+                <th>Department</th>
+                <th>Year</th>
+                <th>Usage (mins)</th>
+                <th>Hotspot Access</th>
+                <th>Actions</th>
+            </tr>
+        </thead>
+        <tbody>
+    """
+
+    def generate_content():
+        yield header
+        yield from generate_rows()
+
+    page = generate_html_stream("Manage Students", generate_content(), is_logged_in=True)
+    return Response(stream_with_context(page), mimetype='text/html')
+
+@app.route('/admin/add_student', methods=['GET', 'POST'])
+def add_student():
+    if 'student_id' not in session:
+        return redirect(url_for('login'))
+    
+    if request.method == 'POST':
+        admission_number = request.form['admission_number']
+        full_name = request.form['full_name']
+        email = request.form['email']
+        password = request.form['password']
+        department = request.form['department']
+        year_of_study = request.form['year_of_study']
+        hotspot_access = 'hotspot_access' in request.form
+        
+        student = Student(
+            admission_number=admission_number,
+            full_name=full_name,
+            email=email,
+            department=department,
+            year_of_study=year_of_study,
+            hotspot_access=hotspot_access
+        )
+        student.set_password(password)
+        
+        db.session.add(student)
+        db.session.commit()
+        invalidate_student_cache(student.id)
+        
+        flash('Student added successfully', 'success')
+        return redirect(url_for('admin_students'))
+    
+    content = """
+    <h2>Add New Student</h2>
+    <form method="POST">
+        <label for="admission_number">Admission Number:</label>
+        <input type="text" id="admission_number" name="admission_number" required>
+        
+        <label for="full_name">Full Name:</label>
+        <input type="text" id="full_name" name="full_name" required>
+        
+        <label for="email">Email:</label>
+        <input type="email" id="email" name="email" required>
+        
+        <label for="password">Password:</label>
+        <input type="password" id="password" name="password" required>
+        
+        <label for="department">Department:</label>
+        <input type="text" id="department" name="department" required>
+        
+        <label for="year_of_study">Year of Study:</label>
+        <input type="number" id="year_of_study" name="year_of_study" min="1" max="6" required>
+        
+        <label>
+            <input type="checkbox" name="hotspot_access" value="true">
+            Grant Hotspot Access Immediately
+        </label>
+        
+        <button type="submit">Add Student</button>
+    </form>
+    <div class="nav-links">
+        <a href="/admin/students">Back to Student List</a>
+    </div>
+    """
+    return generate_html("Add Student", content, is_logged_in=True)
+
+# Bulk student import
+STUDENT_IMPORT_FIELDS = ('admission_number', 'full_name', 'email', 'password',
+                         'department', 'year_of_study')
+
+def parse_student_rows(reader, existing_admissions, existing_emails):
+    """Validate CSV rows up front. Returns (valid rows, errors) where errors
+    are (line number, message) pairs."""
+    rows = []
+    errors = []
+    seen_admissions = set(existing_admissions)
+    seen_emails = set(existing_emails)
+
+    missing = [field for field in STUDENT_IMPORT_FIELDS if field not in (reader.fieldnames or ())]
+    if missing:
+        return rows, [(1, f"Missing columns: {', '.join(missing)}")]
+
+    for line_number, record in enumerate(reader, start=2):
+        values = {field: (record.get(field) or '').strip() for field in STUDENT_IMPORT_FIELDS}
+        empty = [field for field in STUDENT_IMPORT_FIELDS if not values[field]]
+        if empty:
+            errors.append((line_number, f"Missing value for {', '.join(empty)}"))
+            continue
+        try:
+            year_of_study = int(values['year_of_study'])
+        except ValueError:
+            errors.append((line_number, f"Invalid year of study: {values['year_of_study']}"))
+            continue
+
+        email = values['email'].lower()
+        if values['admission_number'] in seen_admissions:
+            errors.append((line_number, f"Duplicate admission number: {values['admission_number']}"))
+            continue
+        if email in seen_emails:
+            errors.append((line_number, f"Duplicate email: {values['email']}"))
+            continue
+        seen_admissions.add(values['admission_number'])
+        seen_emails.add(email)
+
+        hotspot_access = (record.get('hotspot_access') or '').strip().lower()
+        rows.append((line_number, {
+            'admission_number': values['admission_number'],
+            'full_name': values['full_name'],
+            'email': values['email'],
+            'password': values['password'],
+            'department': values['department'],
+            'year_of_study': year_of_study,
+            'hotspot_access': hotspot_access in ('1', 'true', 'yes', 'y'),
+            'is_active': True,
+            'internet_usage_minutes': 0,
+        }))
+    return rows, errors
+
+_process_pool = None
+_process_pool_workers = None
+_process_pool_jobs = None
+_process_pool_lock = threading.Lock()
+
+class ProcessPoolBusy(Exception):
+    """No process pool slot freed up within PROCESS_POOL_WAIT_SECONDS."""
+
+def _get_process_pool():
+    global _process_pool, _process_pool_workers, _process_pool_jobs
+    with _process_pool_lock:
+        if _process_pool is None:
+            import multiprocessing
+            from concurrent.futures import ProcessPoolExecutor
+            _process_pool_workers = app.config['PROCESS_POOL_WORKERS'] or os.cpu_count() or 1
+            # Spawn rather than fork: by now the reaper and usage threads may
+            # be running, and forking a threaded process can deadlock the child.
+            _process_pool = ProcessPoolExecutor(max_workers=_process_pool_workers,
+                                                mp_context=multiprocessing.get_context('spawn'))
+        if _process_pool_jobs is None:
+            _process_pool_jobs = threading.BoundedSemaphore(app.config['PROCESS_POOL_MAX_JOBS'])
+        return _process_pool, _process_pool_workers
+
+def _discard_process_pool(executor):
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is executor:
+            _process_pool = None
+    executor.shutdown(wait=False, cancel_futures=True)
+
+def process_pool_map(function, items):
+    """function(item) for every item, computed in the shared process pool and
+    returned as a list in order. Raises ProcessPoolBusy if every slot stays
+    taken for PROCESS_POOL_WAIT_SECONDS."""
+    from concurrent.futures.process import BrokenProcessPool
+    _get_process_pool()
+    if not _process_pool_jobs.acquire(timeout=app.config['PROCESS_POOL_WAIT_SECONDS']):
+        raise ProcessPoolBusy()
+    try:
+        # A worker that dies (say, killed for memory) breaks the whole pool;
+        # replace it and try once more rather than failing every later job.
+        for attempt in range(2):
+            executor, workers = _get_process_pool()
+            chunksize = max(1, len(items) // (workers * 4))
+            try:
+                return list(executor.map(function, items, chunksize=chunksize))
+            except BrokenProcessPool:
+                _discard_process_pool(executor)
+                if attempt:
+                    raise
+    finally:
+        _process_pool_jobs.release()
+
+def hash_passwords(passwords):
+    # Password hashing is deliberately slow and CPU bound, so spread it over
+    # processes rather than threads.
+    if len(passwords) < 2:
+        return [hash_password(password) for password in passwords]
+    return process_pool_map(hash_password, passwords)
+
+def insert_student_batch(batch, errors):
+    try:
+        db.session.execute(db.insert(Student), [values for _, values in batch])
+        db.session.commit()
+        return len(batch)
+    except exc.IntegrityError:
+        db.session.rollback()
+
+    # Something in the batch collided (e.g. a concurrent insert); retry row by
+    # row so only the offending rows are reported.
+    imported = 0
+    for line_number, values in batch:
+        try:
+            db.session.execute(db.insert(Student), [values])
+            db.session.commit()
+            imported += 1
+        except exc.IntegrityError:
+            db.session.rollback()
+            errors.append((line_number, f"Admission number or email already exists: {values['admission_number']}"))
+    return imported
+
+def import_students_csv(stream, batch_size=None):
+    """Import students from a CSV text stream. Returns (imported count, errors)."""
+    batch_size = batch_size or app.config['BULK_IMPORT_BATCH_SIZE']
+
+    existing_admissions = {row[0] for row in db.session.query(Student.admission_number)}
+    existing_emails = {row[0].lower() for row in db.session.query(Student.email)}
+    try:
+        rows, errors = parse_student_rows(csv.DictReader(stream), existing_admissions, existing_emails)
+    except UnicodeDecodeError:
+        # Typically a sheet saved from Excel as plain "CSV" (cp1252). Rows are
+        # only inserted after the whole file parses, so nothing was written.
+        return 0, [(1, "File is not UTF-8 encoded; save it as \"CSV UTF-8\" and try again")]
+
+    hashes = hash_passwords([values.pop('password') for _, values in rows])
+    for (_, values), password_hash in zip(rows, hashes):
+        values['password_hash'] = password_hash
+
+    imported = 0
+    for start in range(0, len(rows), batch_size):
+        imported += insert_student_batch(rows[start:start + batch_size], errors)
+
+    if imported:
+        access_allowlist.invalidate()
+    errors.sort()
+    return imported, errors
+
+@app.route('/admin/import_students', methods=['GET', 'POST'])
+def import_students():
+    if 'student_id' not in session:
+        return redirect(url_for('login'))
+
+    result_html = ""
+    if request.method == 'POST':
+        upload = request.files.get('csv_file')
+        if not upload or not upload.filename:
+            flash('Please choose a CSV file to import', 'danger')
+            return redirect(url_for('import_students'))
+
+        stream = io.TextIOWrapper(upload.stream, encoding='utf-8-sig', newline='')
+        try:
+            imported, errors = import_students_csv(stream)
+        except ProcessPoolBusy:
+            flash('Other imports or vouchers are being prepared; try again in a minute', 'warning')
+            return redirect(url_for('import_students'))
+
+        errors_html = "".join(f"""
+            <tr>
+                <td>{line_number}</td>
+                <td>{escape(message)}</td>
+            </tr>
+            """ for line_number, message in errors)
+        result_html = f"""
+    <div class="student-info">
+        <p><strong>Imported:</strong> {imported}</p>
+        <p><strong>Rejected:</strong> {len(errors)}</p>
+    </div>
+    """
+        if errors:
+            result_html += f"""
+    <table>
+        <thead>
+            <tr>
+                <th>Line</th>
+                <th>Error</th>
+            </tr>
+        </thead>
+        <tbody>
+            {errors_html}
+        </tbody>
+    </table>
+    """
+
+    content = f"""
+    <h2>Import Students</h2>
+    {result_html}
+    <form method="POST" enctype="multipart/form-data">
+        <p>Upload a CSV file with the columns: {', '.join(STUDENT_IMPORT_FIELDS)} and optionally hotspot_access.</p>
+        <label for="csv_file">CSV File:</label>
+        <input type="file" id="csv_file" name="csv_file" accept=".csv,text/csv" required>
+        
+        <button type="submit">Import Students</button>
+    </form>
+    <div class="nav-links">
+        <a href="/admin/students">Back to Student List</a>
+    </div>
+    """
+    messages = get_flashed_messages(with_categories=True)
+    return generate_html("Import Students", content, messages, is_logged_in=True)
+
+@app.cli.command('import-students')
+@click.argument('csv_path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--batch-size', type=int, default=None, help='Rows per transaction.')
+@click.option('--workers', type=int, default=None, help='Password hashing processes.')
+def import_students_command(csv_path, batch_size, workers):
+    """Bulk import students from a CSV file."""
+    if workers:
+        app.config['PROCESS_POOL_WORKERS'] = workers
+    with open(csv_path, encoding='utf-8-sig', newline='') as stream:
+        imported, errors = import_students_csv(stream, batch_size)
+    for line_number, message in errors:
+        click.echo(f"line {line_number}: {message}", err=True)
+    click.echo(f"Imported {imported} students, rejected {len(errors)}")
+
+
+# Abandoned session reaper
+def close_abandoned_sessions_batch(idle_minutes, batch_size, now=None):
+    """Close one batch of abandoned sessions at their last reported activity
+    and credit the minutes up to it. Returns the number of sessions closed."""
+    now = now or datetime.datetime.utcnow()
+    cutoff = now - datetime.timedelta(minutes=idle_minutes)
+    session_table = HotspotSession.__table__
+    last_active = db.func.coalesce(session_table.c.last_activity, session_table.c.start_time)
+    # A session can't have been active before it started, so the start_time
+    # bound lets the open-session index do the narrowing.
+    idle = db.and_(session_table.c.end_time.is_(None), session_table.c.start_time < cutoff,
+                   last_active < cutoff)
+    session_ids = db.session.execute(
+        db.select(session_table.c.id).where(idle).order_by(session_table.c.id).limit(batch_size)
+    ).scalars().all()
+    if not session_ids:
+        return 0
+
+    # The UPDATE takes the write lock and RETURNING reports exactly the rows it
+    # closed, so sessions a concurrent logout or usage report got to first are
+    # left alone.
+    closing = db.session.execute(
+        session_table.update()
+        .where(session_table.c.id.in_(session_ids), idle)
+        .values(end_time=last_active)
+        .returning(session_table.c.student_id, session_table.c.start_time,
+                   session_table.c.end_time, session_table.c.data_used_mb)
+    ).all()
+    if not closing:
+        db.session.rollback()
+        return 0
+
+    minutes = collections.Counter()
+    for row in closing:
+        minutes[row.student_id] += session_minutes(row.start_time, row.end_time)
+    credits = [{'credit_student_id': student_id, 'minutes': total} for student_id, total in minutes.items() if total]
+    if credits:
+        student_table = Student.__table__
+        db.session.execute(
+            student_table.update()
+            .where(student_table.c.id == db.bindparam('credit_student_id'))
+            .values(internet_usage_minutes=db.func.coalesce(student_table.c.internet_usage_minutes, 0)
+                    + db.bindparam('minutes')),
+            credits
+        )
+    departments = dict(db.session.execute(
+        db.select(Student.id, Student.department).where(Student.id.in_(list(minutes)))
+    ).all())
+    record_session_usage((row.student_id, departments.get(row.student_id), row.start_time,
+                          session_minutes(row.start_time, row.end_time), row.data_used_mb)
+                         for row in closing)
+    db.session.commit()
+    return len(closing)
+
+def close_abandoned_sessions(idle_minutes=None, batch_size=None):
+    idle_minutes = idle_minutes or app.config['SESSION_IDLE_MINUTES']
+    batch_size = batch_size or app.config['SESSION_REAPER_BATCH_SIZE']
+    total = 0
+    while True:
+        closed = close_abandoned_sessions_batch(idle_minutes, batch_size)
+        if not closed:
+            return total
+        total += closed
+
+def _session_reaper_loop(interval):
+    while True:
+        time.sleep(interval)
+        with app.app_context():
+            try:
+                closed = close_abandoned_sessions()
+                if closed:
+                    app.logger.info("Closed %d abandoned hotspot sessions", closed)
+            except Exception:
+                db.session.rollback()
+                app.logger.exception("Session reaper failed")
+
+def start_session_reaper():
+    interval = app.config['SESSION_REAPER_INTERVAL_SECONDS']
+    if interval <= 0:
+        return None
+    thread = threading.Thread(target=_session_reaper_loop, args=(interval,),
+                              name='session-reaper', daemon=True)
+    thread.start()
+    return thread
+
+@app.cli.command('reap-sessions')
+@click.option('--idle-minutes', type=int, default=None, help='Close sessions idle longer than this.')
+@click.option('--batch-size', type=int, default=None, help='Sessions closed per transaction.')
+def reap_sessions_command(idle_minutes, batch_size):
+    """Close abandoned hotspot sessions and credit their usage."""
+    closed = close_abandoned_sessions(idle_minutes, batch_size)
+    click.echo(f"Closed {closed} abandoned sessions")
+
+# Usage reports
+app.config['USAGE_REPORT_DEFAULT_DAYS'] = 120
+
+def parse_report_date(value, default):
+    try:
+        return datetime.date.fromisoformat(value) if value else default
+    except ValueError:
+        return default
+
+@app.route('/admin/usage')
+def usage_report():
+    if 'student_id' not in session:
+        return redirect(url_for('login'))
+
+    today = datetime.datetime.utcnow().date()
+    end = parse_report_date(request.args.get('end'), today)
+    start = parse_report_date(request.args.get('start'),
+                              end - datetime.timedelta(days=app.config['USAGE_REPORT_DEFAULT_DAYS']))
+    reporting = reporting_session()
+
+    departments = reporting.query(
+        DailyDepartmentUsage.department,
+        db.func.sum(DailyDepartmentUsage.sessions).label('sessions'),
+        db.func.sum(DailyDepartmentUsage.minutes).label('minutes'),
+        db.func.sum(DailyDepartmentUsage.data_used_mb).label('data_used_mb'),
+    ).filter(
+        DailyDepartmentUsage.day.between(start, end)
+    ).group_by(DailyDepartmentUsage.department).order_by(db.desc('minutes')).all()
+
+    in_range = DailyStudentUsage.day.between(start, end)
+    years = reporting.query(
+        Student.year_of_study,
+        db.func.sum(DailyStudentUsage.sessions).label('sessions'),
+        db.func.sum(DailyStudentUsage.minutes).label('minutes'),
+        db.func.sum(DailyStudentUsage.data_used_mb).label('data_used_mb'),
+    ).join(Student, Student.id == DailyStudentUsage.student_id).filter(
+        in_range
+    ).group_by(Student.year_of_study).order_by(Student.year_of_study).all()
+
+    top_students = reporting.query(
+        Student.admission_number,
+        Student.full_name,
+        Student.department,
+        db.func.sum(DailyStudentUsage.minutes).label('minutes'),
+        db.func.sum(DailyStudentUsage.data_used_mb).label('data_used_mb'),
+    ).join(Student, Student.id == DailyStudentUsage.student_id).filter(
+        in_range
+    ).group_by(Student.id).order_by(db.desc('minutes')).limit(20).all()
+
+    departments_html = "".join(f"""
+            <tr>
+                <td>{row.department or 'Unassigned'}</td>
+                <td>{row.sessions}</td>
+                <td>{row.minutes}</td>
+                <td>{row.data_used_mb}</td>
+            </tr>
+            """ for row in departments)
+    years_html = "".join(f"""
+            <tr>
+                <td>{row.year_of_study}</td>
+                <td>{row.sessions}</td>
+                <td>{row.minutes}</td>
+                <td>{row.data_used_mb}</td>
+            </tr>
+            """ for row in years)
+    students_html = "".join(f"""
+            <tr>
+                <td>{row.admission_number}</td>
+                <td>{row.full_name}</td>
+                <td>{row.department}</td>
+                <td>{row.minutes}</td>
+                <td>{row.data_used_mb}</td>
+            </tr>
+            """ for row in top_students)
+
+    content = f"""
+    <h2>Usage Reports</h2>
+    <form method="GET">
+        <label for="start">From:</label>
+        <input type="date" id="start" name="start" value="{start.isoformat()}">
+        
+        <label for="end">To:</label>
+        <input type="date" id="end" name="end" value="{end.isoformat()}">
+        
+        <button type="submit">Show Report</button>
+    </form>
+    
+    <h3>By Department</h3>
+    <table>
+        <thead>
+            <tr>
+                <th>Department</th>
+                <th>Sessions</th>
+                <th>Minutes</th>
+                <th>Data (MB)</th>
+            </tr>
+        </thead>
+        <tbody>
+            {departments_html}
+        </tbody>
+    </table>
+    
+    <h3>By Year of Study</h3>
+    <table>
+        <thead>
+            <tr>
+                <th>Year</th>
+                <th>Sessions</th>
+                <th>Minutes</th>
+                <th>Data (MB)</th>
+            </tr>
+        </thead>
+        <tbody>
+            {years_html}
+        </tbody>
+    </table>
+    
+    <h3>Top Students</h3>
+    <table>
+        <thead>
+            <tr>
+                <th>Admission No.</th>
+                <th>Student Name</th>
+                <th>Department</th>
+                <th>Minutes</th>
+                <th>Data (MB)</th>
+            </tr>
+        </thead>
+        <tbody>
+            {students_html}
+        </tbody>
+    </table>
+    <div class="nav-links">
+        <a href="/admin">Back to Admin Dashboard</a>
+    </div>
+    """
+    return generate_html("Usage Reports", content, is_logged_in=True)
+
+@app.cli.command('rebuild-usage-rollups')
+def rebuild_usage_rollups_command():
+    """Rebuild the daily usage rollups from session history."""
+    rebuild_usage_rollups()
+    click.echo("Usage rollups rebuilt")
+
+# Session history export
+SESSION_EXPORT_COLUMNS = ('session_id', 'student_id', 'admission_number', 'department',
+                          'start_time', 'end_time', 'data_used_mb')
+app.config['SESSION_EXPORT_BATCH_SIZE'] = 2000
+
+def iter_session_export(reporting, start, end, department=None, export_format='csv'):
+    """Yield an export of sessions started in [start, end] as text chunks,
+    one chunk per fetched batch so memory stays flat."""
+    batch_size = app.config['SESSION_EXPORT_BATCH_SIZE']
+
+    def segment_rows(table, lower, upper):
+        query = db.select(
+            table.c.id, table.c.student_id, Student.admission_number,
+            Student.department, table.c.start_time, table.c.end_time,
+            table.c.data_used_mb,
+        ).join(
+            Student, Student.id == table.c.student_id
+        ).where(
+            table.c.start_time >= lower, table.c.start_time < upper
+        ).order_by(table.c.start_time, table.c.id)
+        if department:
+            query = query.where(Student.department == department)
+        return reporting.execute(query.execution_options(stream_results=True, yield_per=batch_size))
+
+    # Read the live table and archive months one window at a time, each in
+    # its own index order, so rows go out as soon as they are read instead
+    # of after sorting the whole range.
+    segments = session_history_segments(
+        reporting.connection(),
+        datetime.datetime.combine(start, datetime.time.min),
+        datetime.datetime.combine(end + datetime.timedelta(days=1), datetime.time.min),
+    )
+    rows = itertools.chain.from_iterable(
+        heapq.merge(*(segment_rows(table, lower, upper) for table in tables), key=lambda row: (row[4], row[0]))
+        if len(tables) > 1 else segment_rows(tables[0], lower, upper)
+        for tables, lower, upper in segments
+    )
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer) if export_format == 'csv' else None
+    if writer:
+        writer.writerow(SESSION_EXPORT_COLUMNS)
+
+    for batch in iter(lambda: list(itertools.islice(rows, batch_size)), []):
+        for row in batch:
+            values = (row[0], row[1], row[2], row[3], row[4].isoformat(sep=' ') if row[4] else None,
+                      row[5].isoformat(sep=' ') if row[5] else None, row[6])
+            if writer:
+                writer.writerow(values)
+            else:
+                buffer.write(json.dumps(dict(zip(SESSION_EXPORT_COLUMNS, values))))
+                buffer.write('\n')
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+@app.route('/admin/export/sessions')
+def export_sessions():
+    if 'student_id' not in session:
+        return redirect(url_for('login'))
+
+    today = datetime.datetime.utcnow().date()
+    if 'start' not in request.args:
+        content = f"""
+    <h2>Export Session History</h2>
+    <form method="GET">
+        <label for="start">From:</label>
+        <input type="date" id="start" name="start" value="{(today - datetime.timedelta(days=30)).isoformat()}" required>
+        
+        <label for="end">To:</label>
+        <input type="date" id="end" name="end" value="{today.isoformat()}" required>
+        
+        <label for="department">Department (optional):</label>
+        <input type="text" id="department" name="department">
+        
+        <label for="format">Format:</label>
+        <select id="format" name="format">
+            <option value="csv">CSV</option>
+            <option value="ndjson">NDJSON</option>
+        </select>
+        
+        <button type="submit">Export</button>
+    </form>
+    <div class="nav-links">
+        <a href="/admin">Back to Admin Dashboard</a>
+    </div>
+    """
+        return generate_html("Export Sessions", content, is_logged_in=True)
+
+    end = parse_report_date(request.args.get('end'), today)
+    start = parse_report_date(request.args.get('start'), end - datetime.timedelta(days=30))
+    department = request.args.get('department', '').strip() or None
+    export_format = 'ndjson' if request.args.get('format') == 'ndjson' else 'csv'
+
+    chunks = iter_session_export(reporting_session(), start, end, department, export_format)
+    response = Response(
+        stream_with_context(chunks),
+        mimetype='application/x-ndjson' if export_format == 'ndjson' else 'text/csv'
+    )
+    response.headers['Content-Disposition'] = \
+        f'attachment; filename="sessions-{start.isoformat()}-{end.isoformat()}.{export_format}"'
+    return response
+
+@app.cli.command('export-sessions')
+@click.option('--start', type=click.DateTime(formats=['%Y-%m-%d']), required=True)
+@click.option('--end', type=click.DateTime(formats=['%Y-%m-%d']), required=True)
+@click.option('--department', default=None)
+@click.option('--format', 'export_format', type=click.Choice(['csv', 'ndjson']), default='csv')
+@click.option('--output', type=click.File('w'), default='-', help='Defaults to stdout.')
+def export_sessions_command(start, end, department, export_format, output):
+    """Stream hotspot sessions for a date range as CSV or NDJSON."""
+    for chunk in iter_session_export(reporting_session(), start.date(), end.date(), department, export_format):
+        output.write(chunk)
+
+# Metrics
+app.config['METRICS_TOKEN'] = os.environ.get('METRICS_TOKEN')
+
+class Metrics:
+    """In-process request, SQL and login counters, rendered in the Prometheus
+    text format. Updates are a dict lookup and a few additions under a lock."""
+
+    BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.requests = collections.Counter()
+        self.latency = {}
+        self.queries = collections.Counter()
+        self.query_seconds = collections.Counter()
+        self.logins = collections.Counter()
+
+    def observe_request(self, endpoint, method, status, seconds, queries, query_seconds):
+        with self.lock:
+            self.requests[(endpoint, method, status)] += 1
+            histogram = self.latency.get((endpoint, method))
+            if histogram is None:
+                histogram = self.latency[(endpoint, method)] = [[0] * len(self.BUCKETS), 0.0, 0]
+            bucket = bisect.bisect_left(self.BUCKETS, seconds)
+            if bucket < len(self.BUCKETS):
+                histogram[0][bucket] += 1
+            histogram[1] += seconds
+            histogram[2] += 1
+            self.queries[endpoint] += queries
+            self.query_seconds[endpoint] += query_seconds
+
+    def count_login(self, success):
+        with self.lock:
+            self.logins['success' if success else 'failure'] += 1
+
+    def render(self, samples):
+        lines = []
+
+        def header(name, kind, help_text):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        with self.lock:
+            header('hotspot_http_requests_total', 'counter', 'HTTP requests by endpoint, method and status.')
+            for (endpoint, method, status), count in sorted(self.requests.items()):
+                lines.append(f'hotspot_http_requests_total{{endpoint="{endpoint}",method="{method}",status="{status}"}} {count}')
+
+            header('hotspot_http_request_duration_seconds', 'histogram', 'Request latency by endpoint.')
+            for (endpoint, method), (buckets, total, count) in sorted(self.latency.items()):
+                labels = f'endpoint="{endpoint}",method="{method}"'
+                cumulative = 0
+                for bound, bucket_count in zip(self.BUCKETS, buckets):
+                    cumulative += bucket_count
+                    lines.append(f'hotspot_http_request_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+                lines.append(f'hotspot_http_request_duration_seconds_bucket{{{labels},le="+Inf"}} {count}')
+                lines.append(f'hotspot_http_request_duration_seconds_sum{{{labels}}} {total:.6f}')
+                lines.append(f'hotspot_http_request_duration_seconds_count{{{labels}}} {count}')
+
+            header('hotspot_sql_queries_total', 'counter', 'SQL statements executed while serving each endpoint.')
+            for endpoint, count in sorted(self.queries.items()):
+                lines.append(f'hotspot_sql_queries_total{{endpoint="{endpoint}"}} {count}')
+            header('hotspot_sql_query_seconds_total', 'counter', 'Time spent in SQL while serving each endpoint.')
+            for endpoint, seconds in sorted(self.query_seconds.items()):
+                lines.append(f'hotspot_sql_query_seconds_total{{endpoint="{endpoint}"}} {seconds:.6f}')
+
+            header('hotspot_logins_total', 'counter', 'Login attempts by result.')
+            for result in ('success', 'failure'):
+                lines.append(f'hotspot_logins_total{{result="{result}"}} {self.logins[result]}')
+
+        for name, kind, help_text, value in samples:
+            header(name, kind, help_text)
+            lines.append(f"{name} {value}")
+        return "\n".join(lines) + "\n"
+
+metrics = Metrics()
+
+@db_event.listens_for(Engine, 'before_cursor_execute')
+def _start_query_timer(conn, cursor, statement, parameters, context, executemany):
+    # Kept on the execution context, which is dropped with the statement even
+    # when it fails and after_cursor_execute never runs.
+    if context is not None:
+        context.query_started = time.perf_counter()
+
+@db_event.listens_for(Engine, 'after_cursor_execute')
+def _stop_query_timer(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, 'query_started', None)
+    if started is None:
+        return
+    if has_request_context() and 'query_count' in g:
+        g.query_count += 1
+        g.query_seconds += time.perf_counter() - started
+
+@app.before_request
+def _start_request_timer():
+    g.request_started = time.perf_counter()
+    g.query_count = 0
+    g.query_seconds = 0.0
+
+@app.after_request
+def _record_request_metrics(response):
+    if 'request_started' in g:
+        metrics.observe_request(
+            request.endpoint or 'unmatched', request.method, response.status_code,
+            time.perf_counter() - g.request_started, g.query_count, g.query_seconds
+        )
+    return response
+
+@app.route('/admin/metrics')
+def metrics_endpoint():
+    token = app.config['METRICS_TOKEN']
+    if token:
+        # Scrapers authenticate with a bearer token rather than a login session.
+        if not hmac.compare_digest(request.headers.get('Authorization', ''), f"Bearer {token}"):
+            abort(403)
+    elif 'student_id' not in session:
+        return redirect(url_for('login'))
+
+    active_sessions = reporting_session().execute(
+        db.select(db.func.count()).select_from(HotspotSession).where(HotspotSession.end_time.is_(None))
+    ).scalar()
+    samples = [
+        ('hotspot_active_sessions', 'gauge', 'Hotspot sessions without an end time.', active_sessions),
+        ('hotspot_student_cache_hits_total', 'counter', 'Logged-in student cache hits.', student_cache_stats['hits']),
+        ('hotspot_student_cache_misses_total', 'counter', 'Logged-in student cache misses.', student_cache_stats['misses']),
+        ('hotspot_student_cache_entries', 'gauge', 'Logged-in student cache size.', len(_student_cache)),
+        ('hotspot_qrcode_cache_entries', 'gauge', 'Rendered QR codes held in memory.', len(_qrcode_cache)),
+    ]
+    samples.extend(usage_buffer.metric_samples())
+    samples.extend(device_resolver.metric_samples())
+    samples.append(('hotspot_request_event_streams', 'gauge', 'Open request-queue event streams.',
+                    request_events.streams))
+    response = make_response(metrics.render(samples))
+    response.headers['Content-Type'] = 'text/plain; version=0.0.4; charset=utf-8'
+    return response
+
+# Device usage ingestion. Access points push byte counters every few
+# seconds; they are summed in memory per session (or per student when the AP
+# only knows the student) and written out in one batched UPDATE per flush.
+app.config['GATEWAY_TOKEN'] = os.environ.get('GATEWAY_TOKEN')
+app.config['USAGE_FLUSH_INTERVAL_SECONDS'] = float(os.environ.get('USAGE_FLUSH_INTERVAL_SECONDS', 10))
+app.config['USAGE_BUFFER_MAX_KEYS'] = int(os.environ.get('USAGE_BUFFER_MAX_KEYS', 100000))
+app.config['USAGE_MAX_RECORDS_PER_REQUEST'] = 5000
+
+BYTES_PER_MB = 1024 * 1024
+
+def gateway_authorized():
+    token = app.config['GATEWAY_TOKEN']
+    return bool(token) and hmac.compare_digest(request.headers.get('Authorization', ''), f"Bearer {token}")
+
+class UsageBuffer:
+    def __init__(self, max_keys):
+        self.max_keys = max_keys
+        self.lock = threading.Lock()
+        self.pending = {}
+        # Bytes short of a whole MB, kept per session until the next flush.
+        self.carry = {}
+        self.stats = collections.Counter()
+        self.flusher = None
+
+    def add(self, records):
+        """Buffer (kind, id, bytes, timestamp) records. Returns how many were
+        accepted; the rest were dropped because the buffer is full."""
+        accepted = 0
+        with self.lock:
+            for kind, key_id, delta, timestamp in records:
+                key = (kind, key_id)
+                entry = self.pending.get(key)
+                if entry is None:
+                    if len(self.pending) >= self.max_keys:
+                        self.stats['dropped_full'] += 1
+                        continue
+                    entry = self.pending[key] = [0, timestamp]
+                entry[0] += delta
+                if timestamp > entry[1]:
+                    entry[1] = timestamp
+                accepted += 1
+            self.stats['accepted'] += accepted
+        return accepted
+
+    def drain(self):
+        with self.lock:
+            pending, self.pending = self.pending, {}
+        return pending
+
+    def restore(self, pending):
+        """Put drained entries back after a failed flush so the next one
+        retries them; entries that no longer fit are counted as dropped."""
+        with self.lock:
+            for key, (delta, timestamp) in pending.items():
+                entry = self.pending.get(key)
+                if entry is None:
+                    if len(self.pending) >= self.max_keys:
+                        self.stats['dropped_full'] += 1
+                        continue
+                    self.pending[key] = [delta, timestamp]
+                else:
+                    entry[0] += delta
+                    if timestamp > entry[1]:
+                        entry[1] = timestamp
+
+    def metric_samples(self):
+        return [
+            ('hotspot_usage_records_accepted_total', 'counter', 'Usage records buffered.', self.stats['accepted']),
+            ('hotspot_usage_records_dropped_total', 'counter', 'Usage records dropped because the buffer was full.', self.stats['dropped_full']),
+            ('hotspot_usage_records_invalid_total', 'counter', 'Usage records rejected as malformed.', self.stats['invalid']),
+            ('hotspot_usage_unattributed_total', 'counter', 'Student usage with no session to credit.', self.stats['unattributed']),
+            ('hotspot_usage_flushes_total', 'counter', 'Usage buffer flushes.', self.stats['flushes']),
+            ('hotspot_usage_sessions_updated_total', 'counter', 'Session rows updated by flushes.', self.stats['rows_updated']),
+            ('hotspot_usage_pending_keys', 'gauge', 'Sessions and students waiting to be flushed.', len(self.pending)),
+            ('hotspot_usage_buffer_capacity', 'gauge', 'Maximum pending keys before records are dropped.', self.max_keys),
+        ]
+
+    def flush(self):
+        """Write buffered usage to hotspot_session. Returns rows updated."""
+        pending = self.drain()
+        if not pending:
+            return 0
+        previous_carry = {}
+        try:
+            credited = self._write(pending, previous_carry)
+        except Exception:
+            with self.lock:
+                for session_id, carried in previous_carry.items():
+                    if carried:
+                        self.carry[session_id] = carried
+                    else:
+                        self.carry.pop(session_id, None)
+            self.restore(pending)
+            raise
+        for student_id, start_time, megabytes in credited:
+            quota_engine.record(student_id, start_time, megabytes)
+
+        self.stats['flushes'] += 1
+        self.stats['rows_updated'] += len(credited)
+        return len(credited)
+
+    def _write(self, pending, previous_carry):
+        """Apply drained entries in one transaction. Returns the
+        (student_id, start_time, megabytes) credited to each session."""
+        session_bytes = collections.Counter()
+        session_seen = {}
+        student_usage = {}
+        for (kind, key_id), (delta, timestamp) in pending.items():
+            if kind == 'session':
+                session_bytes[key_id] += delta
+                session_seen[key_id] = timestamp
+            else:
+                student_usage[key_id] = (delta, timestamp)
+
+        if student_usage:
+            # Credit student-only records to the student's latest session that
+            # had started by the time of that student's latest record.
+            bounds = db.values(
+                db.column('student_id', db.Integer), db.column('seen_at', db.DateTime), name='bounds'
+            ).data([(student_id, timestamp) for student_id, (_, timestamp) in student_usage.items()]).cte()
+            resolved = db.session.execute(
+                db.select(bounds.c.student_id, db.func.max(HotspotSession.id))
+                .join(HotspotSession, db.and_(HotspotSession.student_id == bounds.c.student_id,
+                                              HotspotSession.start_time <= bounds.c.seen_at))
+                .group_by(bounds.c.student_id)
+            ).all()
+            for student_id, session_id in resolved:
+                delta, timestamp = student_usage.pop(student_id)
+                session_bytes[session_id] += delta
+                session_seen[session_id] = max(session_seen.get(session_id, timestamp), timestamp)
+            self.stats['unattributed'] += len(student_usage)
+
+        updates = []
+        with self.lock:
+            for session_id, delta in session_bytes.items():
+                previous_carry[session_id] = self.carry.pop(session_id, 0)
+                total = delta + previous_carry[session_id]
+                megabytes, remainder = divmod(total, BYTES_PER_MB)
+                if remainder:
+                    self.carry[session_id] = remainder
+                # Sessions short of a whole MB are still active; record that.
+                updates.append({'session_id': session_id, 'megabytes': megabytes,
+                                'seen_at': session_seen[session_id]})
+            if len(self.carry) > self.max_keys:
+                self.carry.clear()
+        if not updates:
+            return []
+
+        session_table = HotspotSession.__table__
+        seen_at = db.bindparam('seen_at', type_=db.DateTime)
+        db.session.execute(
+            session_table.update()
+            .where(session_table.c.id == db.bindparam('session_id'))
+            .values(data_used_mb=db.func.coalesce(session_table.c.data_used_mb, 0) + db.bindparam('megabytes'),
+                    last_activity=db.func.max(db.func.coalesce(session_table.c.last_activity, seen_at), seen_at)),
+            updates
+        )
+        added = {row['session_id']: row['megabytes'] for row in updates if row['megabytes']}
+        if not added:
+            db.session.commit()
+            return []
+        touched = db.session.execute(
+            db.select(HotspotSession.id, HotspotSession.student_id, Student.department,
+                      HotspotSession.start_time, HotspotSession.end_time)
+            .join(Student, Student.id == HotspotSession.student_id)
+            .where(HotspotSession.id.in_(list(added)))
+        ).all()
+        # Sessions that already closed were rolled up without this data.
+        record_session_usage(((row.student_id, row.department, row.start_time, 0, added[row.id])
+                              for row in touched if row.end_time is not None),
+                             new_sessions=False)
+        db.session.commit()
+        return [(row.student_id, row.start_time, added[row.id]) for row in touched]
+
+    def _flush_loop(self, interval):
+        while True:
+            time.sleep(interval)
+            with app.app_context():
+                try:
+                    self.flush()
+                    device_resolver.flush_last_seen()
+                except Exception:
+                    db.session.rollback()
+                    app.logger.exception("Usage flush failed")
+
+    def ensure_flusher(self):
+        if self.flusher is None:
+            with self.lock:
+                if self.flusher is None:
+                    self.flusher = threading.Thread(
+                        target=self._flush_loop, args=(app.config['USAGE_FLUSH_INTERVAL_SECONDS'],),
+                        name='usage-flusher', daemon=True
+                    )
+                    self.flusher.start()
+
+usage_buffer = UsageBuffer(app.config['USAGE_BUFFER_MAX_KEYS'])
+
+@atexit.register
+def _flush_usage_on_exit():
+    if usage_buffer.pending or device_resolver.seen:
+        with app.app_context():
+            usage_buffer.flush()
+            device_resolver.flush_last_seen()
+
+def parse_usage_record(record):
+    if not isinstance(record, dict):
+        return None
+    delta = record.get('bytes')
+    if isinstance(delta, bool) or not isinstance(delta, int) or delta < 0:
+        return None
+    if record.get('session_id') is not None:
+        kind, key_id = 'session', record['session_id']
+    elif record.get('student_id') is not None:
+        kind, key_id = 'student', record['student_id']
+    elif record.get('mac') is not None:
+        kind, key_id = 'mac', normalize_mac(record['mac'])
+        if key_id is None:
+            return None
+    else:
+        return None
+    if kind != 'mac' and (isinstance(key_id, bool) or not isinstance(key_id, int)):
+        return None
+    try:
+        timestamp = datetime.datetime.fromisoformat(record['timestamp']) if record.get('timestamp') \
+            else datetime.datetime.utcnow()
+    except (TypeError, ValueError):
+        return None
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+    return kind, key_id, delta, timestamp
+
+@app.route('/api/usage', methods=['POST'])
+def ingest_usage():
+    if not gateway_authorized():
+        abort(403)
+
+    payload = request.get_json(silent=True)
+    records = payload.get('records') if isinstance(payload, dict) else None
+    if not isinstance(records, list):
+        return jsonify({'error': 'expected {"records": [...]}'}), 400
+    if len(records) > app.config['USAGE_MAX_RECORDS_PER_REQUEST']:
+        return jsonify({'error': 'too many records',
+                        'max_records': app.config['USAGE_MAX_RECORDS_PER_REQUEST']}), 413
+
+    parsed = []
+    for record in records:
+        values = parse_usage_record(record)
+        if values is None:
+            usage_buffer.stats['invalid'] += 1
+        else:
+            parsed.append(values)
+
+    # Resolve every MAC in the batch at once and credit its owner.
+    devices = device_resolver.resolve_many({key_id for kind, key_id, _, _ in parsed if kind == 'mac'})
+    unknown = 0
+    attributed = []
+    for kind, key_id, delta, timestamp in parsed:
+        if kind == 'mac':
+            device = devices.get(key_id)
+            if device is None:
+                unknown += 1
+                continue
+            device_resolver.touch(device.id, timestamp)
+            kind, key_id = 'student', device.student_id
+        attributed.append((kind, key_id, delta, timestamp))
+    usage_buffer.stats['unattributed'] += unknown
+
+    usage_buffer.ensure_flusher()
+    accepted = usage_buffer.add(attributed)
+    body = {'accepted': accepted, 'invalid': len(records) - len(parsed),
+            'unknown_devices': unknown, 'dropped': len(attributed) - accepted}
+    if body['dropped']:
+        # Tell the AP to back off and resend the dropped records later.
+        response = jsonify(body)
+        response.status_code = 429
+        response.headers['Retry-After'] = str(int(app.config['USAGE_FLUSH_INTERVAL_SECONDS']) or 1)
+        return response
+    return jsonify(body), 202
+
+# Data quotas. Limits and current usage live in plain dicts so checks are a
+# couple of lookups; the tables are rebuilt from the database every
+# QUOTA_SYNC_INTERVAL_SECONDS and topped up by usage flushes in between.
+app.config['QUOTA_SYNC_INTERVAL_SECONDS'] = float(os.environ.get('QUOTA_SYNC_INTERVAL_SECONDS', 60))
+QUOTA_PERIODS = ('daily', 'weekly')
+
+def quota_period_starts(now=None):
+    today = (now or datetime.datetime.utcnow()).date()
+    return today, today - datetime.timedelta(days=today.weekday())
+
+class QuotaEngine:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.limits = {}
+        self.usage = {}
+        self.day = None
+        self.week_start = None
+        self.sync_lock = threading.Lock()
+        self.synced = threading.Event()
+        self.syncer = None
+
+    def sync(self):
+        """Reload limits and this day's/week's usage, then swap them in."""
+        day, week_start = quota_period_starts()
+        with db.engine.connect() as conn:
+            self._load(conn, day, week_start)
+
+    def _load(self, conn, day, week_start):
+        day_start = datetime.datetime.combine(day, datetime.time.min)
+        week_start_time = datetime.datetime.combine(week_start, datetime.time.min)
+        quotas = conn.execute(
+            db.select(DataQuota.student_id, DataQuota.department, DataQuota.period, DataQuota.limit_mb)
+        ).all()
+        department_limits = collections.defaultdict(lambda: [None, None])
+        student_limits = collections.defaultdict(lambda: [None, None])
+        for student_id, department, period, limit_mb in quotas:
+            target = student_limits[student_id] if student_id is not None else department_limits[department]
+            index = QUOTA_PERIODS.index(period)
+            # Several rows for the same target and period: the tightest wins.
+            target[index] = limit_mb if target[index] is None else min(target[index], limit_mb)
+
+        limits = {}
+        if department_limits:
+            members = conn.execute(
+                db.select(Student.id, Student.department).where(Student.department.in_(list(department_limits)))
+            ).all()
+            for student_id, department in members:
+                limits[student_id] = tuple(department_limits[department])
+        for student_id, (daily, weekly) in student_limits.items():
+            inherited = limits.get(student_id, (None, None))
+            limits[student_id] = (daily if daily is not None else inherited[0],
+                                  weekly if weekly is not None else inherited[1])
+
+        usage = {}
+        if limits:
+            today_mb = db.func.sum(db.case((HotspotSession.start_time >= day_start, HotspotSession.data_used_mb), else_=0))
+            week_mb = db.func.sum(HotspotSession.data_used_mb)
+            for student_id, day_used, week_used in conn.execute(
+                db.select(HotspotSession.student_id, today_mb, week_mb)
+                .where(HotspotSession.start_time >= week_start_time)
+                .group_by(HotspotSession.student_id)
+            ):
+                if student_id in limits:
+                    usage[student_id] = [day_used or 0, week_used or 0]
+
+        with self.lock:
+            self.limits, self.usage = limits, usage
+            self.day, self.week_start = day, week_start
+        self.synced.set()
+
+    def record(self, student_id, start_time, megabytes):
+        if student_id not in self.limits:
+            return
+        day = start_time.date()
+        with self.lock:
+            if self.week_start is None or day < self.week_start:
+                return
+            counters = self.usage.setdefault(student_id, [0, 0])
+            if day >= self.day:
+                counters[0] += megabytes
+            counters[1] += megabytes
+
+    def status(self, student_id):
+        """(used today, daily limit, used this week, weekly limit) or None
+        when the student has no quota."""
+        self._ensure_synced()
+        limits = self.limits.get(student_id)
+        if limits is None:
+            return None
+        day_used, week_used = self.usage.get(student_id, (0, 0))
+        today, week_start = quota_period_starts()
+        # Counters roll over between syncs as soon as the period changes.
+        if today != self.day:
+            day_used = 0
+        if week_start != self.week_start:
+            week_used = 0
+        return day_used, limits[0], week_used, limits[1]
+
+    def is_over_quota(self, student_id):
+        status = self.status(student_id)
+        if status is None:
+            return False
+        day_used, daily, week_used, weekly = status
+        return (daily is not None and day_used >= daily) or (weekly is not None and week_used >= weekly)
+
+    def _ensure_synced(self):
+        if self.synced.is_set():
+            return
+        with self.sync_lock:
+            if self.synced.is_set():
+                return
+            self.sync()
+            if self.syncer is None:
+                self.syncer = threading.Thread(target=self._sync_loop, name='quota-sync', daemon=True)
+                self.syncer.start()
+
+    def _sync_loop(self):
+        while True:
+            time.sleep(app.config['QUOTA_SYNC_INTERVAL_SECONDS'])
+            with app.app_context():
+                try:
+                    self.sync()
+                except Exception:
+                    db.session.rollback()
+                    app.logger.exception("Quota sync failed")
+
+quota_engine = QuotaEngine()
+
+def quota_summary_html(student_id):
+    status = quota_engine.status(student_id)
+    if status is None:
+        return ""
+    day_used, daily, week_used, weekly = status
+    parts = []
+    if daily is not None:
+        parts.append(f"<p><strong>Data Used Today:</strong> {day_used} of {daily} MB</p>")
+    if weekly is not None:
+        parts.append(f"<p><strong>Data Used This Week:</strong> {week_used} of {weekly} MB</p>")
+    return "".join(parts)
+
+@app.route('/api/quota/<int:student_id>')
+def quota_status(student_id):
+    if not gateway_authorized():
+        abort(403)
+    status = quota_engine.status(student_id)
+    if status is None:
+        return jsonify({'student_id': student_id, 'over_quota': False, 'limited': False})
+    day_used, daily, week_used, weekly = status
+    return jsonify({
+        'student_id': student_id,
+        'over_quota': quota_engine.is_over_quota(student_id),
+        'limited': True,
+        'daily': {'used_mb': day_used, 'limit_mb': daily},
+        'weekly': {'used_mb': week_used, 'limit_mb': weekly},
+    })
+
+@app.route('/admin/quotas', methods=['GET', 'POST'])
+def manage_quotas():
+    if 'student_id' not in session:
+        return redirect(url_for('login'))
+
+    if request.method == 'POST':
+        if request.form.get('delete_id'):
+            quota = DataQuota.query.get(request.form.get('delete_id', type=int))
+            if quota:
+                db.session.delete(quota)
+                db.session.commit()
+                flash('Quota removed', 'info')
+        else:
+            scope = request.form.get('scope')
+            target = request.form.get('target', '').strip()
+            period = request.form.get('period')
+            limit_mb = request.form.get('limit_mb', type=int)
+            quota = None
+            if period in QUOTA_PERIODS and limit_mb is not None and limit_mb >= 0 and target:
+                if scope == 'student':
+                    student = Student.query.filter_by(admission_number=target).first()
+                    if student:
+                        quota = DataQuota(student_id=student.id, period=period, limit_mb=limit_mb)
+                elif scope == 'department':
+                    quota = DataQuota(department=target, period=period, limit_mb=limit_mb)
+            if quota is None:
+                flash('Enter a valid admission number or department, period and limit', 'danger')
+            else:
+                db.session.add(quota)
+                db.session.commit()
+                flash('Quota saved', 'success')
+        quota_engine.sync()
+        return redirect(url_for('manage_quotas'))
+
+    quotas = db.session.query(DataQuota, Student.admission_number).outerjoin(
+        Student, Student.id == DataQuota.student_id
+    ).order_by(DataQuota.department, Student.admission_number, DataQuota.period).all()
+    quotas_html = "".join(f"""
+        <tr>
+            <td>{'Student ' + admission_number if quota.student_id else 'Department ' + quota.department}</td>
+            <td>{quota.period.title()}</td>
+            <td>{quota.limit_mb} MB</td>
+            <td>
+                <form method="POST" style="padding: 0; box-shadow: none;">
+                    <input type="hidden" name="delete_id" value="{quota.id}">
+                    <button type="submit">Remove</button>
+                </form>
+            </td>
+        </tr>
+        """ for quota, admission_number in quotas)
+
+    content = f"""
+    <h2>Data Quotas</h2>
+    <p>A student's own quota overrides their department's for the same period.</p>
+    <table>
+        <thead>
+            <tr>
+                <th>Applies To</th>
+                <th>Period</th>
+                <th>Allowance</th>
+                <th>Actions</th>
+            </tr>
+        </thead>
+        <tbody>
+            {quotas_html}
+        </tbody>
+    </table>
+    
+    <form method="POST">
+        <h3>Add Quota</h3>
+        <label for="scope">Applies To:</label>
+        <select id="scope" name="scope">
+            <option value="department">Department</option>
+            <option value="student">Student</option>
+        </select>
+        
+        <label for="target">Department or Admission Number:</label>
+        <input type="text" id="target" name="target" required>
+        
+        <label for="period">Period:</label>
+        <select id="period" name="period">
+            <option value="daily">Daily</option>
+            <option value="weekly">Weekly</option>
+        </select>
+        
+        <label for="limit_mb">Allowance (MB):</label>
+        <input type="number" id="limit_mb" name="limit_mb" min="0" required>
+        
+        <button type="submit">Save Quota</button>
+    </form>
+    <div class="nav-links">
+        <a href="/admin">Back to Admin Dashboard</a>
+    </div>
+    """
+    messages = get_flashed_messages(with_categories=True)
+    return generate_html("Data Quotas", content, messages, is_logged_in=True)
+
+# Captive-portal authorization. Gateways ask "may this student through?" on
+# every new connection, so answer from an immutable snapshot of allowed
+# students instead of the database. Writes that can change access mark the
+# snapshot stale; the next reader rebuilds it and swaps it in whole. The
+# max age bounds staleness for changes made by other worker processes.
+app.config['ALLOWLIST_MAX_AGE_SECONDS'] = float(os.environ.get('ALLOWLIST_MAX_AGE_SECONDS', 30))
+
+AllowlistSnapshot = collections.namedtuple('AllowlistSnapshot', [
+    'version', 'built_at', 'student_ids', 'admission_numbers', 'groups', 'body',
+])
+
+class AccessAllowlist:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.snapshot = None
+        self.stale = True
+
+    def invalidate(self):
+        self.stale = True
+
+    def current(self):
+        snapshot = self.snapshot
+        if snapshot is None or self.stale or \
+                time.monotonic() - snapshot.built_at > app.config['ALLOWLIST_MAX_AGE_SECONDS']:
+            with self.lock:
+                snapshot = self.snapshot
+                if snapshot is None or self.stale or \
+                        time.monotonic() - snapshot.built_at > app.config['ALLOWLIST_MAX_AGE_SECONDS']:
+                    # Clear the flag first so a write landing mid-rebuild
+                    # marks the new snapshot stale again.
+                    self.stale = False
+                    snapshot = self.snapshot = self._build()
+        return snapshot
+
+    def _build(self):
+        with db.engine.connect() as conn:
+            rows = conn.execute(
+                db.select(Student.id, Student.admission_number, Student.department, Student.year_of_study)
+                .where(Student.hotspot_access.is_(True), Student.is_active.is_(True))
+                .order_by(Student.id)
+            ).all()
+        students = [{'id': row.id, 'admission_number': row.admission_number} for row in rows]
+        version = hashlib.sha256(json.dumps(students, separators=(',', ':')).encode('utf-8')).hexdigest()
+        body = json.dumps({'version': version, 'count': len(students), 'students': students},
+                          separators=(',', ':')).encode('utf-8')
+        return AllowlistSnapshot(
+            version=version,
+            built_at=time.monotonic(),
+            student_ids=frozenset(row.id for row in rows),
+            admission_numbers=types.MappingProxyType({row.admission_number: row.id for row in rows}),
+            groups=types.MappingProxyType({row.id: (row.department, row.year_of_study) for row in rows}),
+            body=body,
+        )
+
+access_allowlist = AccessAllowlist()
+
+@app.route('/api/authorize')
+def authorize_client():
+    if not gateway_authorized():
+        abort(403)
+
+    snapshot = access_allowlist.current()
+    student_id = request.args.get('student_id', type=int)
+    if student_id is None and request.args.get('admission_number'):
+        student_id = snapshot.admission_numbers.get(request.args['admission_number'])
+
+    reason = None
+    if student_id is None or student_id not in snapshot.student_ids:
+        reason = 'not_allowed'
+    elif quota_engine.is_over_quota(student_id):
+        reason = 'over_quota'
+    elif access_schedule.is_closed(*snapshot.groups[student_id]):
+        reason = 'schedule'
+    return jsonify({'allowed': reason is None, 'reason': reason, 'version': snapshot.version})
+
+@app.route('/api/allowlist')
+def allowlist_snapshot():
+    if not gateway_authorized():
+        abort(403)
+
+    snapshot = access_allowlist.current()
+    response = make_response(snapshot.body)
+    response.mimetype = 'application/json'
+    response.set_etag(snapshot.version)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response.make_conditional(request)
+
+# Device tracking. Gateways see MAC addresses, not students, so keep an LRU
+# of MAC -> (device, owner) in each process. Unknown MACs are remembered for
+# a short while too, so a burst from an unregistered client costs one query.
+app.config['DEVICE_CACHE_SIZE'] = int(os.environ.get('DEVICE_CACHE_SIZE', 50000))
+app.config['DEVICE_NEGATIVE_TTL_SECONDS'] = float(os.environ.get('DEVICE_NEGATIVE_TTL_SECONDS', 60))
+app.config['DEVICE_LOOKUP_CHUNK_SIZE'] = 500
+
+MAC_SEPARATORS = str.maketrans('', '', ':-. ')
+HEX_DIGITS = frozenset('0123456789abcdef')
+
+def normalize_mac(value):
+    """Return the MAC as lowercase colon-separated pairs, or None if it isn't one."""
+    if not isinstance(value, str):
+        return None
+    digits = value.translate(MAC_SEPARATORS).lower()
+    if len(digits) != 12 or not HEX_DIGITS.issuperset(digits):
+        return None
+    return ':'.join(digits[i:i + 2] for i in range(0, 12, 2))
+
+DeviceEntry = collections.namedtuple('DeviceEntry', ['id', 'student_id'])
+
+class DeviceResolver:
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.lock = threading.Lock()
+        # mac -> (DeviceEntry or None, expiry for unknown MACs)
+        self.entries = collections.OrderedDict()
+        # device id -> latest time a gateway reported traffic from it
+        self.seen = {}
+        self.stats = collections.Counter()
+
+    def resolve(self, mac):
+        mac = normalize_mac(mac)
+        return self.resolve_many([mac]).get(mac) if mac else None
+
+    def resolve_many(self, macs):
+        """Map normalized MACs to DeviceEntry; unknown MACs are left out."""
+        found = {}
+        missing = []
+        now = time.monotonic()
+        with self.lock:
+            for mac in macs:
+                cached = self.entries.get(mac)
+                if cached is None or (cached[1] is not None and cached[1] < now):
+                    missing.append(mac)
+                    continue
+                self.entries.move_to_end(mac)
+                if cached[0] is not None:
+                    found[mac] = cached[0]
+            self.stats['hits'] += len(macs) - len(missing)
+            self.stats['misses'] += len(missing)
+        if not missing:
+            return found
+
+        loaded = {}
+        chunk_size = app.config['DEVICE_LOOKUP_CHUNK_SIZE']
+        for start in range(0, len(missing), chunk_size):
+            rows = db.session.execute(
+                db.select(Device.mac_address, Device.id, Device.student_id)
+                .where(Device.mac_address.in_(missing[start:start + chunk_size]))
+            ).all()
+            for mac, device_id, student_id in rows:
+                loaded[mac] = DeviceEntry(device_id, student_id)
+        expires = now + app.config['DEVICE_NEGATIVE_TTL_SECONDS']
+        with self.lock:
+            for mac in missing:
+                entry = loaded.get(mac)
+                self.entries[mac] = (entry, None if entry else expires)
+                self.entries.move_to_end(mac)
+            while len(self.entries) > self.capacity:
+                self.entries.popitem(last=False)
+                self.stats['evictions'] += 1
+        found.update(loaded)
+        return found
+
+    def invalidate(self, macs):
+        with self.lock:
+            for mac in macs:
+                self.entries.pop(mac, None)
+
+    def touch(self, device_id, timestamp):
+        with self.lock:
+            current = self.seen.get(device_id)
+            if current is None or timestamp > current:
+                self.seen[device_id] = timestamp
+
+    def flush_last_seen(self):
+        with self.lock:
+            seen, self.seen = self.seen, {}
+        if not seen:
+            return 0
+        device_table = Device.__table__
+        db.session.execute(
+            device_table.update()
+            .where(device_table.c.id == db.bindparam('device_id'),
+                   db.or_(device_table.c.last_seen.is_(None), device_table.c.last_seen < db.bindparam('seen_at')))
+            .values(last_seen=db.bindparam('seen_at')),
+            [{'device_id': device_id, 'seen_at': seen_at} for device_id, seen_at in seen.items()]
+        )
+        db.session.commit()
+        return len(seen)
+
+    def metric_samples(self):
+        return [
+            ('hotspot_device_cache_hits_total', 'counter', 'MAC lookups answered from the device cache.', self.stats['hits']),
+            ('hotspot_device_cache_misses_total', 'counter', 'MAC lookups that went to the database.', self.stats['misses']),
+            ('hotspot_device_cache_evictions_total', 'counter', 'Devices evicted from the cache.', self.stats['evictions']),
+            ('hotspot_device_cache_entries', 'gauge', 'MACs held in the device cache.', len(self.entries)),
+        ]
+
+device_resolver = DeviceResolver(app.config['DEVICE_CACHE_SIZE'])
+
+def register_device(student_id, mac, label=None):
+    """Find or add the student's device for this MAC. Returns None if the MAC
+    is malformed or already belongs to another student. Does not commit."""
+    mac = normalize_mac(mac)
+    if mac is None:
+        return None
+    device = Device.query.filter_by(mac_address=mac).first()
+    if device is None:
+        # Two logins with the same new MAC can race; let the unique index pick
+        # the winner and use its row. The savepoint keeps the caller's writes.
+        try:
+            with db.session.begin_nested():
+                device = Device(mac_address=mac, student_id=student_id, label=label)
+                db.session.add(device)
+        except exc.IntegrityError:
+            device = Device.query.filter_by(mac_address=mac).first()
+            if device is None or device.student_id != student_id:
+                return None
+    elif device.student_id != student_id:
+        return None
+    else:
+        device.last_seen = datetime.datetime.utcnow()
+        if label:
+            device.label = label
+    return device
+
+@app.route('/devices', methods=['GET', 'POST'])
+def devices():
+    if 'student_id' not in session:
+        return redirect(url_for('login'))
+
+    student_id = session['student_id']
+    if request.method == 'POST':
+        mac = normalize_mac(request.form.get('mac_address', ''))
+        label = request.form.get('label', '').strip()[:50] or None
+        if mac is None:
+            flash('Enter a MAC address like 00:1A:2B:3C:4D:5E', 'danger')
+        elif register_device(student_id, mac, label) is None:
+            flash('That device is registered to another student', 'danger')
+        else:
+            db.session.commit()
+            flash('Device registered', 'success')
+        return redirect(url_for('devices'))
+
+    session_counts = db.session.query(
+        HotspotSession.device_id, db.func.count()
+    ).filter(
+        HotspotSession.student_id == student_id, HotspotSession.device_id.isnot(None)
+    ).group_by(HotspotSession.device_id)
+    counts = dict(session_counts.all())
+
+    rows_html = ""
+    for device in Device.query.filter_by(student_id=student_id).order_by(Device.last_seen.desc()):
+        rows_html += f"""
+        <tr>
+            <td>{escape(device.label or '')}</td>
+            <td>{device.mac_address}</td>
+            <td>{device.first_seen.strftime('%Y-%m-%d %H:%M')}</td>
+            <td>{device.last_seen.strftime('%Y-%m-%d %H:%M')}</td>
+            <td>{counts.get(device.id, 0)}</td>
+            <td>
+                <form method="POST" action="/devices/{device.id}/remove">
+                    <button type="submit">Remove</button>
+                </form>
+            </td>
+        </tr>
+        """
+
+    content = f"""
+    <h2>My Devices</h2>
+    <table>
+        <thead>
+            <tr>
+                <th>Label</th>
+                <th>MAC Address</th>
+                <th>First Seen</th>
+                <th>Last Seen</th>
+                <th>Sessions</th>
+                <th>Action</th>
+            </tr>
+        </thead>
+        <tbody>
+            {rows_html}
+        </tbody>
+    </table>
+
+    <h3>Register a Device</h3>
+    <form method="POST">
+        <label for="mac_address">MAC Address:</label>
+        <input type="text" id="mac_address" name="mac_address" required>
+
+        <label for="label">Label:</label>
+        <input type="text" id="label" name="label" maxlength="50">
+
+        <button type="submit">Register</button>
+    </form>
+
+    <div class="nav-links">
+        <a href="/profile">Back to Profile</a>
+    </div>
+    """
+    messages = get_flashed_messages(with_categories=True)
+    return generate_html("My Devices", content, messages, is_logged_in=True)
+
+@app.route('/devices/<int:device_id>/remove', methods=['POST'])
+def remove_device(device_id):
+    if 'student_id' not in session:
+        return redirect(url_for('login'))
+
+    device = Device.query.get(device_id)
+    if device is None or device.student_id != session['student_id']:
+        abort(404)
+
+    HotspotSession.query.filter_by(device_id=device.id).update({'device_id': None})
+    db.session.delete(device)
+    db.session.commit()
+    if session.get('device_id') == device_id:
+        session.pop('device_id')
+    flash('Device removed', 'info')
+    return redirect(url_for('devices'))
+
+@app.route('/api/devices/resolve', methods=['POST'])
+def resolve_devices():
+    if not gateway_authorized():
+        abort(403)
+
+    payload = request.get_json(silent=True)
+    macs = payload.get('macs') if isinstance(payload, dict) else None
+    if not isinstance(macs, list):
+        return jsonify({'error': 'expected {"macs": [...]}'}), 400
+    if len(macs) > app.config['USAGE_MAX_RECORDS_PER_REQUEST']:
+        return jsonify({'error': 'too many MACs',
+                        'max_macs': app.config['USAGE_MAX_RECORDS_PER_REQUEST']}), 413
+
+    normalized = {mac: normalize_mac(mac) for mac in macs if isinstance(mac, str)}
+    found = device_resolver.resolve_many({mac for mac in normalized.values() if mac})
+    results = {}
+    for mac, key in normalized.items():
+        entry = found.get(key)
+        results[mac] = {'device_id': entry.id, 'student_id': entry.student_id} if entry else None
+    return jsonify({'devices': results})
+
+# Access schedules. Closed windows are compiled into one bitmap per
+# (department, year) group with a bit for every minute of the week, so
+# "closed right now?" is a single bit test. Rules are re-read at most every
+# SCHEDULE_REFRESH_SECONDS and only recompiled when they actually changed.
+app.config['SCHEDULE_REFRESH_SECONDS'] = float(os.environ.get('SCHEDULE_REFRESH_SECONDS', 60))
+# Windows are entered in school time; timestamps are stored in UTC.
+app.config['SCHEDULE_UTC_OFFSET_MINUTES'] = int(os.environ.get('SCHEDULE_UTC_OFFSET_MINUTES', 0))
+
+MINUTES_PER_DAY = 24 * 60
+MINUTES_PER_WEEK = 7 * MINUTES_PER_DAY
+WEEKDAY_NAMES = ('Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun')
+
+def week_minute(now=None):
+    now = (now or datetime.datetime.utcnow()) + datetime.timedelta(minutes=app.config['SCHEDULE_UTC_OFFSET_MINUTES'])
+    return now.weekday() * MINUTES_PER_DAY + now.hour * 60 + now.minute
+
+def compile_access_windows(rules):
+    """Turn (department, year_of_study, weekdays, start_minute, end_minute)
+    rules into {(department, year_of_study): bitmap of closed minutes}."""
+    bitmaps = {}
+    for department, year_of_study, weekdays, start_minute, end_minute in rules:
+        bitmap = bitmaps.setdefault((department, year_of_study), bytearray(MINUTES_PER_WEEK // 8))
+        length = (end_minute - start_minute) % MINUTES_PER_DAY or MINUTES_PER_DAY
+        for day in range(7):
+            if weekdays & (1 << day):
+                start = day * MINUTES_PER_DAY + start_minute
+                for minute in range(start, start + length):
+                    minute %= MINUTES_PER_WEEK
+                    bitmap[minute >> 3] |= 1 << (minute & 7)
+    return {key: bytes(bitmap) for key, bitmap in bitmaps.items()}
+
+class AccessSchedule:
+    def __init__(self):
+        self.lock = threading.Lock()
+        # (rules, group bitmaps, per-student-group merged bitmaps), swapped together
+        self.compiled = ((), {}, {})
+        self.stale = True
+        self.checked_at = 0.0
+
+    def invalidate(self):
+        self.stale = True
+
+    def _refresh(self):
+        if not self.stale and time.monotonic() - self.checked_at < app.config['SCHEDULE_REFRESH_SECONDS']:
+            return
+        with self.lock:
+            if not self.stale and time.monotonic() - self.checked_at < app.config['SCHEDULE_REFRESH_SECONDS']:
+                return
+            self.stale = False
+            with db.engine.connect() as conn:
+                rules = tuple(tuple(row) for row in conn.execute(
+                    db.select(AccessWindow.department, AccessWindow.year_of_study, AccessWindow.weekdays,
+                              AccessWindow.start_minute, AccessWindow.end_minute)
+                    .order_by(AccessWindow.id)
+                ))
+            if rules != self.compiled[0]:
+                self.compiled = (rules, compile_access_windows(rules), {})
+            self.checked_at = time.monotonic()
+
+    def bitmap_for(self, department, year_of_study):
+        self._refresh()
+        _, groups, merged = self.compiled
+        if not groups:
+            return None
+        key = (department, year_of_study)
+        bitmap = merged.get(key)
+        if bitmap is None:
+            closed = 0
+            for group in ((department, year_of_study), (department, None), (None, year_of_study), (None, None)):
+                if group in groups:
+                    closed |= int.from_bytes(groups[group], 'little')
+            bitmap = merged[key] = closed.to_bytes(MINUTES_PER_WEEK // 8, 'little') if closed else b''
+        return bitmap
+
+    def is_closed(self, department, year_of_study, now=None):
+        bitmap = self.bitmap_for(department, year_of_study)
+        if not bitmap:
+            return False
+        minute = week_minute(now)
+        return bool(bitmap[minute >> 3] & (1 << (minute & 7)))
+
+access_schedule = AccessSchedule()
+
+def parse_clock(value):
+    try:
+        parsed = datetime.datetime.strptime(value or '', '%H:%M')
+    except ValueError:
+        return None
+    return parsed.hour * 60 + parsed.minute
+
+def format_clock(minute):
+    return f"{minute // 60:02d}:{minute % 60:02d}"
+
+@app.route('/admin/schedules', methods=['GET', 'POST'])
+def manage_schedules():
+    if 'student_id' not in session:
+        return redirect(url_for('login'))
+
+    if request.method == 'POST':
+        if request.form.get('delete_id'):
+            window = AccessWindow.query.get(request.form.get('delete_id', type=int))
+            if window:
+                db.session.delete(window)
+                db.session.commit()
+                flash('Schedule removed', 'info')
+        else:
+            weekdays = sum(1 << day for day in request.form.getlist('weekdays', type=int) if 0 <= day < 7)
+            start_minute = parse_clock(request.form.get('start_time'))
+            end_minute = parse_clock(request.form.get('end_time'))
+            if not weekdays or start_minute is None or end_minute is None:
+                flash('Pick at least one day and enter start and end times as HH:MM', 'danger')
+            else:
+                db.session.add(AccessWindow(
+                    department=request.form.get('department', '').strip() or None,
+                    year_of_study=request.form.get('year_of_study', type=int),
+                    weekdays=weekdays,
+                    start_minute=start_minute,
+                    end_minute=end_minute,
+                    label=request.form.get('label', '').strip()[:100] or None,
+                ))
+                db.session.commit()
+                flash('Schedule saved', 'success')
+        access_schedule.invalidate()
+        return redirect(url_for('manage_schedules'))
+
+    windows = AccessWindow.query.order_by(AccessWindow.department, AccessWindow.year_of_study,
+                                          AccessWindow.start_minute).all()
+    windows_html = "".join(f"""
+        <tr>
+            <td>{escape(window.label or '')}</td>
+            <td>{escape(window.department or 'All departments')}</td>
+            <td>{window.year_of_study or 'All years'}</td>
+            <td>{', '.join(name for day, name in enumerate(WEEKDAY_NAMES) if window.weekdays & (1 << day))}</td>
+            <td>{format_clock(window.start_minute)} - {format_clock(window.end_minute)}</td>
+            <td>
+                <form method="POST" style="padding: 0; box-shadow: none;">
+                    <input type="hidden" name="delete_id" value="{window.id}">
+                    <button type="submit">Remove</button>
+                </form>
+            </td>
+        </tr>
+        """ for window in windows)
+    weekday_inputs = "".join(
+        f'<label><input type="checkbox" name="weekdays" value="{day}"> {name}</label>'
+        for day, name in enumerate(WEEKDAY_NAMES)
+    )
+
+    content = f"""
+    <h2>Access Schedules</h2>
+    <p>The hotspot is closed for the matching students during these windows.</p>
+    <table>
+        <thead>
+            <tr>
+                <th>Label</th>
+                <th>Department</th>
+                <th>Year</th>
+                <th>Days</th>
+                <th>Closed</th>
+                <th>Actions</th>
+            </tr>
+        </thead>
+        <tbody>
+            {windows_html}
+        </tbody>
+    </table>
+
+    <form method="POST">
+        <h3>Add Closed Window</h3>
+        <label for="label">Label:</label>
+        <input type="text" id="label" name="label" maxlength="100" placeholder="Exam hours">
+
+        <label for="department">Department (blank for all):</label>
+        <input type="text" id="department" name="department">
+
+        <label for="year_of_study">Year of Study (blank for all):</label>
+        <input type="number" id="year_of_study" name="year_of_study" min="1" max="6">
+
+        <label>Days:</label>
+        {weekday_inputs}
+
+        <label for="start_time">From:</label>
+        <input type="time" id="start_time" name="start_time" required>
+
+        <label for="end_time">Until:</label>
+        <input type="time" id="end_time" name="end_time" required>
+
+        <button type="submit">Save Schedule</button>
+    </form>
+    <div class="nav-links">
+        <a href="/admin">Back to Admin Dashboard</a>
+    </div>
+    """
+    messages = get_flashed_messages(with_categories=True)
+    return generate_html("Access Schedules", content, messages, is_logged_in=True)
+
+# Session archive. Closed sessions older than the retention window move
+# into one table per month (hotspot_session_archive_YYYYMM) so the live
+# table and its indexes only hold recent history. The daily rollups are
+# left alone; anything that needs the full history reads session_history().
+app.config['SESSION_ARCHIVE_RETENTION_DAYS'] = int(os.environ.get('SESSION_ARCHIVE_RETENTION_DAYS', 180))
+app.config['SESSION_ARCHIVE_BATCH_SIZE'] = int(os.environ.get('SESSION_ARCHIVE_BATCH_SIZE', 5000))
+
+SESSION_ARCHIVE_PREFIX = 'hotspot_session_archive_'
+SESSION_HISTORY_COLUMNS = ('id', 'student_id', 'device_id', 'start_time', 'end_time', 'data_used_mb')
+# Kept out of db.metadata so create_all() and migrations never see them.
+archive_metadata = db.MetaData()
+
+def session_archive_table(month):
+    name = f"{SESSION_ARCHIVE_PREFIX}{month:%Y%m}"
+    table = archive_metadata.tables.get(name)
+    if table is None:
+        table = db.Table(
+            name, archive_metadata,
+            db.Column('id', db.Integer, primary_key=True),
+            db.Column('student_id', db.Integer, nullable=False),
+            db.Column('device_id', db.Integer),
+            db.Column('start_time', db.DateTime),
+            db.Column('end_time', db.DateTime),
+            db.Column('data_used_mb', db.Integer),
+            db.Index(f"ix_{name}_student_start", 'student_id', 'start_time'),
+            db.Index(f"ix_{name}_start", 'start_time'),
+        )
+    return table
+
+def archived_session_months(conn):
+    """First day of every month that has an archive table, oldest first."""
+    months = []
+    for name in db.inspect(conn).get_table_names():
+        if name.startswith(SESSION_ARCHIVE_PREFIX):
+            try:
+                months.append(datetime.datetime.strptime(name[len(SESSION_ARCHIVE_PREFIX):], '%Y%m'))
+            except ValueError:
+                continue
+    return sorted(months)
+
+def next_month(month):
+    return month.replace(year=month.year + 1, month=1) if month.month == 12 else month.replace(month=month.month + 1)
+
+def session_history(conn, start=None, end=None):
+    """Sessions started in [start, end) from the live table and the archive,
+    as one subquery with SESSION_HISTORY_COLUMNS. Archive months outside the
+    range are skipped, and the range is applied to every branch so the live
+    table still uses its start_time index."""
+    tables = [HotspotSession.__table__]
+    for month in archived_session_months(conn):
+        if (end is None or month < end) and (start is None or next_month(month) > start):
+            tables.append(session_archive_table(month))
+
+    branches = []
+    for table in tables:
+        branch = db.select(*[table.c[name] for name in SESSION_HISTORY_COLUMNS])
+        if start is not None:
+            branch = branch.where(table.c.start_time >= start)
+        if end is not None:
+            branch = branch.where(table.c.start_time < end)
+        branches.append(branch)
+    return (db.union_all(*branches) if len(branches) > 1 else branches[0]).subquery('session_history')
+
+def session_history_segments(conn, start, end):
+    """Split [start, end) into windows that can each be read in start_time
+    order from their own indexes: (tables, lower, upper) for every archive
+    month in range, oldest first, then the rest of the live table. Archive
+    windows list the live table too, because sessions still open when their
+    month was archived stay there."""
+    hot = HotspotSession.__table__
+    segments = []
+    lower = start
+    for month in archived_session_months(conn):
+        upper = min(next_month(month), end)
+        if upper <= lower or month >= end:
+            continue
+        segments.append(([session_archive_table(month), hot], max(month, lower), upper))
+        if month > lower:
+            # A gap before this month with no archive table.
+            segments.insert(-1, ([hot], lower, month))
+        lower = upper
+    if lower < end:
+        segments.append(([hot], lower, end))
+    return segments
+
+def archive_sessions_batch(cutoff, batch_size):
+    """Move up to batch_size closed sessions started before cutoff into their
+    month's archive table, in one transaction. Returns rows moved."""
+    hot = HotspotSession.__table__
+    rows = db.session.execute(
+        db.select(hot.c.id, hot.c.start_time)
+        .where(hot.c.start_time < cutoff, hot.c.end_time.isnot(None))
+        .order_by(hot.c.start_time)
+        .limit(batch_size)
+    ).all()
+    if not rows:
+        return 0
+
+    by_month = collections.defaultdict(list)
+    for session_id, start_time in rows:
+        by_month[datetime.datetime(start_time.year, start_time.month, 1)].append(session_id)
+
+    conn = db.session.connection()
+    columns = [hot.c[name] for name in SESSION_HISTORY_COLUMNS]
+    for month, session_ids in by_month.items():
+        table = session_archive_table(month)
+        table.create(conn, checkfirst=True)
+        for index in table.indexes:
+            index.create(conn, checkfirst=True)
+        conn.execute(table.insert().from_select(SESSION_HISTORY_COLUMNS,
+                                                db.select(*columns).where(hot.c.id.in_(session_ids))))
+        conn.execute(hot.delete().where(hot.c.id.in_(session_ids)))
+    db.session.commit()
+    return len(rows)
+
+def archive_sessions(retention_days=None, batch_size=None):
+    retention_days = retention_days if retention_days is not None else app.config['SESSION_ARCHIVE_RETENTION_DAYS']
+    batch_size = batch_size or app.config['SESSION_ARCHIVE_BATCH_SIZE']
+    cutoff = datetime.datetime.utcnow() - datetime.timedelta(days=retention_days)
+    total = 0
+    while True:
+        moved = archive_sessions_batch(cutoff, batch_size)
+        total += moved
+        if moved < batch_size:
+            return total
+
+@app.cli.command('archive-sessions')
+@click.option('--retention-days', type=int, default=None, help='Keep sessions newer than this in the live table.')
+@click.option('--batch-size', type=int, default=None, help='Sessions moved per transaction.')
+@click.option('--vacuum', is_flag=True, help='Reclaim the freed space afterwards (locks the database while it runs).')
+def archive_sessions_command(retention_days, batch_size, vacuum):
+    """Move old closed hotspot sessions into monthly archive tables."""
+    moved = archive_sessions(retention_days, batch_size)
+    click.echo(f"Archived {moved} sessions")
+    if vacuum:
+        with db.engine.connect().execution_options(isolation_level='AUTOCOMMIT') as conn:
+            conn.exec_driver_sql('VACUUM')
+        click.echo("Database compacted")
+
+# Live request queue. Request changes are published to an in-process bus
+# and streamed to open admin pages as server-sent events, so an admin loads
+# the pending list once and then only receives deltas. Recent events are
+# kept so a reconnecting browser (Last-Event-ID) can catch up; one that has
+# fallen further behind is told to reload. The bus is per process: run the
+# admin console on a single (threaded) worker for every change to reach it.
+app.config['REQUEST_EVENTS_BACKLOG'] = int(os.environ.get('REQUEST_EVENTS_BACKLOG', 1000))
+app.config['REQUEST_EVENTS_KEEPALIVE_SECONDS'] = 15
+# Streams end after this long and the browser reconnects, freeing the worker thread.
+app.config['REQUEST_EVENTS_STREAM_SECONDS'] = int(os.environ.get('REQUEST_EVENTS_STREAM_SECONDS', 300))
+
+class EventBus:
+    def __init__(self, backlog):
+        self.condition = threading.Condition()
+        self.events = collections.deque(maxlen=backlog)
+        self.last_id = 0
+        self.streams = 0
+
+    def publish(self, kind, data):
+        with self.condition:
+            self.last_id += 1
+            self.events.append((self.last_id, kind, json.dumps(data, separators=(',', ':'))))
+            self.condition.notify_all()
+        return self.last_id
+
+    def wait(self, after_id, timeout):
+        """Events newer than after_id, waiting up to timeout for one to arrive.
+        Returns None if some of them have already been dropped, or if
+        after_id came from an earlier process and the client must reload."""
+        with self.condition:
+            if after_id > self.last_id:
+                return None
+            if self.last_id == after_id:
+                self.condition.wait(timeout)
+            if self.events and self.events[0][0] > after_id + 1:
+                return None
+            return [event for event in self.events if event[0] > after_id]
+
+request_events = EventBus(app.config['REQUEST_EVENTS_BACKLOG'])
+
+def format_sse(event_id, kind, data):
+    return f"id: {event_id}\nevent: {kind}\ndata: {data}\n\n"
+
+@app.route('/admin/hotspot_requests/events')
+def hotspot_request_events():
+    if 'student_id' not in session:
+        return redirect(url_for('login'))
+
+    last_event_id = request.headers.get('Last-Event-ID', type=int)
+    if last_event_id is None:
+        last_event_id = request.args.get('last_event_id', request_events.last_id, type=int)
+
+    def stream(after_id):
+        with request_events.condition:
+            request_events.streams += 1
+        try:
+            yield "retry: 3000\n\n"
+            deadline = time.monotonic() + app.config['REQUEST_EVENTS_STREAM_SECONDS']
+            while time.monotonic() < deadline:
+                events = request_events.wait(after_id, app.config['REQUEST_EVENTS_KEEPALIVE_SECONDS'])
+                if events is None:
+                    yield format_sse(request_events.last_id, 'reset', '{}')
+                    return
+                if not events:
+                    yield ": keepalive\n\n"
+                    continue
+                yield "".join(format_sse(*event) for event in events)
+                after_id = events[-1][0]
+        finally:
+            with request_events.condition:
+                request_events.streams -= 1
+
+    response = Response(stream(last_event_id), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    # Stop nginx and similar proxies from buffering the stream.
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+# Student search. Every word of the query must match the start of a word
+# in the admission number, name, email or department; results come back in
+# rank order from the FTS5 index, one page at a time.
+app.config['STUDENT_SEARCH_PAGE_SIZE'] = 20
+app.config['STUDENT_SEARCH_MAX_PAGE_SIZE'] = 100
+app.config['STUDENT_SEARCH_MAX_TERMS'] = 8
+app.config['STUDENT_SEARCH_FTS_RECHECK_SECONDS'] = 60
+
+SEARCH_TERM = re.compile(r'\w+')
+
+def student_search_match(text):
+    """FTS5 MATCH expression treating each word as a prefix, or None."""
+    terms = SEARCH_TERM.findall(text)[:app.config['STUDENT_SEARCH_MAX_TERMS']]
+    return ' '.join(f'"{term}"*' for term in terms) or None
+
+# database URI -> time the index was last found missing. Only a missing index
+# is re-checked: it appears once migration 2 runs, possibly in another process.
+_student_fts_missing = {}
+_student_fts_found = set()
+
+def student_fts_available(database_uri):
+    if database_uri in _student_fts_found:
+        return True
+    checked_at = _student_fts_missing.get(database_uri)
+    if checked_at is not None and time.monotonic() - checked_at < app.config['STUDENT_SEARCH_FTS_RECHECK_SECONDS']:
+        return False
+    with db.engine.connect() as conn:
+        available = db.inspect(conn).has_table('student_fts')
+    if available:
+        _student_fts_found.add(database_uri)
+        _student_fts_missing.pop(database_uri, None)
+    else:
+        _student_fts_missing[database_uri] = time.monotonic()
+    return available
+
+def search_students(text, page=1, page_size=None):
+    """Returns (rows, has_more) for one page of matching students."""
+    page_size = page_size or app.config['STUDENT_SEARCH_PAGE_SIZE']
+    match = student_search_match(text)
+    if match is None:
+        return [], False
+
+    columns = (Student.id, Student.admission_number, Student.full_name, Student.email,
+               Student.department, Student.year_of_study, Student.hotspot_access)
+    if student_fts_available(app.config['SQLALCHEMY_DATABASE_URI']):
+        student_fts = db.table('student_fts', db.column('rowid'), db.column('rank'))
+        query = db.select(*columns).join(
+            student_fts, student_fts.c.rowid == Student.id
+        ).where(
+            db.literal_column('student_fts').op('MATCH')(match)
+        ).order_by(student_fts.c.rank)
+    else:
+        conditions = []
+        for term in SEARCH_TERM.findall(text)[:app.config['STUDENT_SEARCH_MAX_TERMS']]:
+            pattern = f"{term}%"
+            conditions.append(db.or_(*(column.like(pattern) for column in columns[1:5])))
+        query = db.select(*columns).where(*conditions).order_by(Student.admission_number)
+
+    rows = reporting_session().execute(
+        query.limit(page_size + 1).offset((page - 1) * page_size)
+    ).all()
+    return rows[:page_size], len(rows) > page_size
+
+@app.route('/admin/students/search')
+def student_search():
+    if 'student_id' not in session:
+        return redirect(url_for('login'))
+
+    text = request.args.get('q', '').strip()
+    page = max(1, request.args.get('page', 1, type=int))
+    page_size = request.args.get('page_size', app.config['STUDENT_SEARCH_PAGE_SIZE'], type=int)
+    page_size = min(max(1, page_size), app.config['STUDENT_SEARCH_MAX_PAGE_SIZE'])
+    rows, has_more = search_students(text, page, page_size)
+
+    if request.args.get('format') == 'json':
+        return jsonify({
+            'query': text,
+            'page': page,
+            'has_more': has_more,
+            'results': [{
+                'id': row.id,
+                'admission_number': row.admission_number,
+                'full_name': row.full_name,
+                'email': row.email,
+                'department': row.department,
+                'year_of_study': row.year_of_study,
+                'hotspot_access': row.hotspot_access,
+            } for row in rows],
+        })
+
+    rows_html = "".join(f"""
+        <tr>
+            <td>{escape(row.admission_number)}</td>
+            <td>{escape(row.full_name)}</td>
+            <td>{escape(row.email)}</td>
+            <td>{escape(row.department or '')}</td>
+            <td>{row.year_of_study}</td>
+            <td>{'Yes' if row.hotspot_access else 'No'}</td>
+        </tr>
+        """ for row in rows)
+    pages_html = ""
+    if page > 1:
+        pages_html += f'<a href="/admin/students/search?{escape(urlencode({"q": text, "page": page - 1, "page_size": page_size}))}">Previous Page</a>'
+    if has_more:
+        pages_html += f'<a href="/admin/students/search?{escape(urlencode({"q": text, "page": page + 1, "page_size": page_size}))}">Next Page</a>'
+
+    content = f"""
+    <h2>Search Students</h2>
+    <form method="GET">
+        <label for="q">Admission number, name, email or department:</label>
+        <input type="search" id="q" name="q" value="{escape(text)}" autocomplete="off" autofocus>
+        <button type="submit">Search</button>
+    </form>
+
+    <table>
+        <thead>
+            <tr>
+                <th>Admission No.</th>
+                <th>Full Name</th>
+                <th>Email</th>
+                <th>Department</th>
+                <th>Year</th>
+                <th>Hotspot Access</th>
+            </tr>
+        </thead>
+        <tbody id="results">
+            {rows_html}
+        </tbody>
+    </table>
+    <div class="nav-links">
+        {pages_html}
+        <a href="/admin/students">Back to Students</a>
+    </div>
+    <script>
+    (function () {{
+        var box = document.getElementById('q');
+        var results = document.getElementById('results');
+        var timer = null;
+        var latest = 0;
+        box.addEventListener('input', function () {{
+            clearTimeout(timer);
+            timer = setTimeout(function () {{
+                var sent = ++latest;
+                fetch('/admin/students/search?format=json&q=' + encodeURIComponent(box.value))
+                    .then(function (response) {{ return response.json(); }})
+                    .then(function (data) {{
+                        // Drop answers to queries the user has already typed past.
+                        if (sent !== latest) return;
+                        results.innerHTML = '';
+                        data.results.forEach(function (student) {{
+                            var row = results.insertRow();
+                            [student.admission_number, student.full_name, student.email,
+                             student.department || '', student.year_of_study,
+                             student.hotspot_access ? 'Yes' : 'No'].forEach(function (text) {{
+                                row.insertCell().textContent = text;
+                            }});
+                        }});
+                    }});
+            }}, 150);
+        }});
+    }})();
+    </script>
+    """
+    return generate_html("Search Students", content, is_logged_in=True)
+
+# Onboarding vouchers. One card per student with their admission number,
+# how to sign in and a QR code that opens the portal login with the
+# admission number filled in. QR rendering is CPU bound, so large classes
+# are drawn in the process pool up front and the cards are then streamed
+# out, so a slow download doesn't keep a pool slot.
+app.config['VOUCHER_MAX_STUDENTS'] = 5000
+app.config['VOUCHERS_PER_PAGE'] = 8
+app.config['VOUCHER_QR_SCALE'] = 4
+# Below this many vouchers the pool costs more to start than it saves.
+app.config['VOUCHER_POOL_THRESHOLD'] = 50
+app.config['VOUCHER_CREDENTIALS_HINT'] = os.environ.get(
+    'VOUCHER_CREDENTIALS_HINT',
+    'Sign in with your admission number and the password issued by the school office.'
+)
+
+VOUCHER_STYLESHEET = """
+body { font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif; margin: 0; color: #333; }
+.sheet { display: grid; grid-template-columns: 1fr 1fr; gap: 12px; padding: 12px; page-break-after: always; }
+.voucher { border: 1px dashed #999; padding: 12px; display: flex; gap: 12px; align-items: center; }
+.voucher svg, .voucher img { width: 120px; height: 120px; flex: none; }
+.voucher h3 { margin: 0 0 4px; }
+.voucher p { margin: 2px 0; font-size: 13px; }
+"""
+
+def voucher_login_url(base_url, admission_number):
+    return f"{base_url.rstrip('/')}/login?{urlencode({'admission_number': admission_number})}"
+
+def voucher_filename(admission_number):
+    return re.sub(r'[^\w.-]', '_', admission_number)
+
+def render_voucher_qr(payload):
+    """QR code for one voucher; runs in a worker process."""
+    import segno
+    url, kind, scale = payload
+    # Any mask is valid; fixing one skips scoring all eight, which is most
+    # of the cost of making a code.
+    qrcode = segno.make(url, micro=False, mask=0)
+    buffer = BytesIO()
+    if kind == 'svg':
+        qrcode.save(buffer, kind='svg', scale=scale, xmldecl=False,
+                    svgclass=None, lineclass=None, nl=False)
+    else:
+        qrcode.save(buffer, kind='png', scale=scale)
+    return buffer.getvalue()
+
+def render_voucher_qrcodes(students, base_url, kind):
+    """One QR code per student, in order."""
+    payloads = [(voucher_login_url(base_url, student.admission_number), kind, app.config['VOUCHER_QR_SCALE'])
+                for student in students]
+    if len(payloads) < app.config['VOUCHER_POOL_THRESHOLD']:
+        return [render_voucher_qr(payload) for payload in payloads]
+    return process_pool_map(render_voucher_qr, payloads)
+
+def voucher_students(department=None, year_of_study=None):
+    query = db.select(
+        Student.admission_number, Student.full_name, Student.department, Student.year_of_study
+    ).where(Student.is_active.is_(True)).order_by(Student.full_name, Student.admission_number)
+    if department:
+        query = query.where(Student.department == department)
+    if year_of_study is not None:
+        query = query.where(Student.year_of_study == year_of_study)
+    return reporting_session().execute(query.limit(app.config['VOUCHER_MAX_STUDENTS'] + 1)).all()
+
+def voucher_card_html(student, ssid, image_html):
+    return f"""
+        <div class="voucher">
+            {image_html}
+            <div>
+                <h3>{escape(student.full_name)}</h3>
+                <p><strong>Admission No.:</strong> {escape(student.admission_number)}</p>
+                <p><strong>Class:</strong> {escape(student.department or '')} year {student.year_of_study}</p>
+                <p><strong>Network:</strong> {escape(ssid)}</p>
+                <p>{escape(app.config['VOUCHER_CREDENTIALS_HINT'])}</p>
+            </div>
+        </div>"""
+
+def iter_voucher_pages(title, cards):
+    """Wrap cards into a printable document, VOUCHERS_PER_PAGE to a page."""
+    yield (f"<!DOCTYPE html>\n<html>\n<head>\n<meta charset=\"utf-8\">\n<title>{escape(title)}</title>\n"
+           f"<style>{VOUCHER_STYLESHEET}</style>\n</head>\n<body>\n")
+    per_page = app.config['VOUCHERS_PER_PAGE']
+    for index, card in enumerate(cards):
+        if index % per_page == 0:
+            yield ('</section>\n' if index else '') + '<section class="sheet">'
+        yield card
+    yield "</section>\n</body>\n</html>\n"
+
+def iter_voucher_document(students, codes, ssid, title):
+    """A single printable HTML document with the QR codes inline as SVG."""
+    cards = (voucher_card_html(student, ssid, code.decode('utf-8')) for student, code in zip(students, codes))
+    return iter_voucher_pages(title, cards)
+
+class ZipStream(io.RawIOBase):
+    """Write-only sink that lets ZipFile write an archive in pieces."""
+    def __init__(self):
+        self.chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self):
+        data = b"".join(self.chunks)
+        self.chunks.clear()
+        return data
+
+def iter_voucher_zip(students, codes, ssid, title):
+    """A ZIP with one PNG QR code per student and a vouchers.html sheet that
+    uses them, yielded a file at a time."""
+    stream = ZipStream()
+    cards = []
+    # PNGs are already compressed; only the sheet is worth deflating.
+    with zipfile.ZipFile(stream, 'w', compression=zipfile.ZIP_STORED) as archive:
+        for student, code in zip(students, codes):
+            filename = f"qr/{voucher_filename(student.admission_number)}.png"
+            archive.writestr(filename, code)
+            cards.append(voucher_card_html(student, ssid, f'<img src="{filename}" alt="">'))
+            yield stream.drain()
+        archive.writestr('vouchers.html', "".join(iter_voucher_pages(title, cards)),
+                         compress_type=zipfile.ZIP_DEFLATED)
+    yield stream.drain()
+
+# format: (mimetype, QR code kind, renderer)
+VOUCHER_FORMATS = {
+    'html': ('text/html', 'svg', iter_voucher_document),
+    'zip': ('application/zip', 'png', iter_voucher_zip),
+}
+
+@app.route('/admin/vouchers')
+def print_vouchers():
+    if 'student_id' not in session:
+        return redirect(url_for('login'))
+
+    if 'format' not in request.args:
+        content = """
+    <h2>Print Wi-Fi Vouchers</h2>
+    <form method="GET">
+        <label for="department">Department:</label>
+        <input type="text" id="department" name="department">
+        
+        <label for="year_of_study">Year of Study (optional):</label>
+        <input type="number" id="year_of_study" name="year_of_study" min="0" max="6">
+        
+        <label for="format">Format:</label>
+        <select id="format" name="format">
+            <option value="html">Printable sheet</option>
+            <option value="zip">ZIP of QR codes and sheet</option>
+        </select>
+        
+        <button type="submit">Generate</button>
+    </form>
+    <div class="nav-links">
+        <a href="/admin">Back to Admin Dashboard</a>
+    </div>
+    """
+        messages = get_flashed_messages(with_categories=True)
+        return generate_html("Wi-Fi Vouchers", content, messages, is_logged_in=True)
+
+    department = request.args.get('department', '').strip() or None
+    year_of_study = request.args.get('year_of_study', type=int)
+    export_format = request.args.get('format') if request.args.get('format') in VOUCHER_FORMATS else 'html'
+    students = voucher_students(department, year_of_study)
+    if not students:
+        flash('No active students match that class', 'warning')
+        return redirect(url_for('print_vouchers'))
+    if len(students) > app.config['VOUCHER_MAX_STUDENTS']:
+        flash(f"That is more than {app.config['VOUCHER_MAX_STUDENTS']} students; pick a department or year", 'danger')
+        return redirect(url_for('print_vouchers'))
+
+    ssid, _ = get_qrcode_config()
+    title = " ".join(str(part) for part in ('Wi-Fi vouchers', department, year_of_study) if part not in (None, ''))
+    mimetype, kind, render = VOUCHER_FORMATS[export_format]
+    try:
+        codes = render_voucher_qrcodes(students, request.url_root, kind)
+    except ProcessPoolBusy:
+        flash('Other vouchers or imports are being prepared; try again in a minute', 'warning')
+        return redirect(url_for('print_vouchers'))
+    response = Response(stream_with_context(render(students, codes, ssid, title)), mimetype=mimetype)
+    if export_format == 'zip':
+        response.headers['Content-Disposition'] = \
+            f'attachment; filename="{voucher_filename(title.replace(" ", "-").lower())}.zip"'
+    return response
+
+@app.cli.command('generate-vouchers')
+@click.option('--department', default=None)
+@click.option('--year', 'year_of_study', type=int, default=None)
+@click.option('--format', 'export_format', type=click.Choice(list(VOUCHER_FORMATS)), default='html')
+@click.option('--base-url', default='http://localhost:5000/', help='Where the portal is served from.')
+@click.option('--workers', type=int, default=None, help='Rendering processes (default: one per CPU).')
+@click.option('--output', type=click.File('wb'), required=True)
+def generate_vouchers_command(department, year_of_study, export_format, base_url, workers, output):
+    """Render onboarding vouchers for a class as HTML or ZIP."""
+    if workers:
+        app.config['PROCESS_POOL_WORKERS'] = workers
+    students = voucher_students(department, year_of_study)
+    if len(students) > app.config['VOUCHER_MAX_STUDENTS']:
+        raise click.ClickException(f"More than {app.config['VOUCHER_MAX_STUDENTS']} students match")
+    ssid, _ = get_qrcode_config()
+    title = " ".join(str(part) for part in ('Wi-Fi vouchers', department, year_of_study) if part not in (None, ''))
+    _, kind, render = VOUCHER_FORMATS[export_format]
+    codes = render_voucher_qrcodes(students, base_url, kind)
+    for chunk in render(students, codes, ssid, title):
+        output.write(chunk.encode('utf-8') if isinstance(chunk, str) else chunk)
+    click.echo(f"Wrote {len(students)} vouchers", err=True)
+
+if __name__ == '__main__':
+    initialize_database()
+    # The debug reloader runs the app in a child process; only start the
+    # reaper there so it doesn't run twice.
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        start_session_reaper()
     app.run(debug=True)
\ No newline at end of file
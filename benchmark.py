@@ -0,0 +1,320 @@
+"""Portal benchmarks.
+
+Runs the real routes in-process against a scratch SQLite database filled
+with a seeded synthetic school, using N concurrent clients, and reports
+throughput and latency percentiles. Results can be saved as JSON and
+compared against an earlier run.
+
+    python benchmark.py login --clients 8 --logins 50
+    python benchmark.py login --hash-method pbkdf2:sha256:600000 --json login.json
+    python benchmark.py routes --students 5000 --sessions 1000000 --json after.json
+    python benchmark.py routes --compare before.json
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import random
+import statistics
+import tempfile
+import threading
+import time
+
+DEPARTMENTS = ('Computer Science', 'Mathematics', 'Physics', 'Chemistry', 'Biology',
+               'Economics', 'History', 'Literature', 'Engineering', 'Business')
+ROUTES = ('/login', '/dashboard', '/profile', '/admin/students',
+          '/admin/hotspot_requests', '/qrcode')
+BENCH_PASSWORD = 'benchmark-password'
+INSERT_CHUNK = 10000
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(latencies, elapsed):
+    return {
+        'requests': len(latencies),
+        'throughput_per_sec': round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        'mean_ms': round(statistics.fmean(latencies) * 1000, 2) if latencies else 0.0,
+        'p50_ms': round(percentile(latencies, 50) * 1000, 2),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 2),
+    }
+
+
+def _insert_chunked(app_module, model, rows):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == INSERT_CHUNK:
+            app_module.db.session.execute(app_module.db.insert(model), chunk)
+            app_module.db.session.commit()
+            chunk = []
+    if chunk:
+        app_module.db.session.execute(app_module.db.insert(model), chunk)
+        app_module.db.session.commit()
+
+
+def generate_dataset(app_module, students, sessions, requests, seed=42, password=BENCH_PASSWORD):
+    """Fill the database with a reproducible synthetic school. Returns the
+    seeded admission numbers."""
+    rng = random.Random(seed)
+    now = datetime.datetime.utcnow()
+    # Every benchmark student shares one hash so seeding doesn't dominate
+    # the run; the login path still verifies it at full cost.
+    password_hash = app_module.hash_password(password)
+
+    admission_numbers = [f"BENCH{i:06d}" for i in range(students)]
+    _insert_chunked(app_module, app_module.Student, ({
+        'admission_number': admission_numbers[i],
+        'full_name': f"Benchmark Student {i}",
+        'email': f"bench{i}@school.edu",
+        'password_hash': password_hash,
+        'department': rng.choice(DEPARTMENTS),
+        'year_of_study': rng.randint(1, 4),
+        'is_active': True,
+        'internet_usage_minutes': 0,
+        'hotspot_access': rng.random() < 0.7,
+    } for i in range(students)))
+    first_id, last_id = app_module.db.session.execute(
+        app_module.db.select(app_module.db.func.min(app_module.Student.id),
+                             app_module.db.func.max(app_module.Student.id))
+        .where(app_module.Student.admission_number.like('BENCH%'))
+    ).one()
+
+    def session_rows():
+        for _ in range(sessions):
+            start = now - datetime.timedelta(minutes=rng.randint(0, 120 * 24 * 60))
+            # A few sessions are left open, as abandoned ones are in practice.
+            end = None if rng.random() < 0.02 else start + datetime.timedelta(minutes=rng.randint(1, 180))
+            yield {
+                'student_id': rng.randint(first_id, last_id),
+                'start_time': start,
+                'end_time': end,
+                'data_used_mb': rng.randint(0, 500),
+            }
+    _insert_chunked(app_module, app_module.HotspotSession, session_rows())
+
+    def request_rows():
+        for _ in range(requests):
+            status = rng.choices(('pending', 'approved', 'rejected'), weights=(3, 6, 1))[0]
+            requested = now - datetime.timedelta(minutes=rng.randint(0, 30 * 24 * 60))
+            yield {
+                'student_id': rng.randint(first_id, last_id),
+                'request_time': requested,
+                'status': status,
+                'approval_time': requested + datetime.timedelta(hours=1) if status == 'approved' else None,
+            }
+    _insert_chunked(app_module, app_module.HotspotRequest, request_rows())
+
+    if app_module.HotspotConfig.query.first() is None:
+        app_module.db.session.add(app_module.HotspotConfig())
+        app_module.db.session.commit()
+    return admission_numbers
+
+
+def run_clients(clients, worker):
+    """Run worker(worker_id) on `clients` threads released together.
+    Returns the wall-clock time taken."""
+    start_barrier = threading.Barrier(clients)
+
+    def start(worker_id):
+        start_barrier.wait()
+        worker(worker_id)
+
+    threads = [threading.Thread(target=start, args=(i,)) for i in range(clients)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - started
+
+
+def login(client, admission_number, password):
+    response = client.post('/login', data={
+        'admission_number': admission_number,
+        'password': password,
+    })
+    return response.status_code == 302 and '/dashboard' in response.headers.get('Location', '')
+
+
+def run_login_benchmark(app_module, admission_numbers, password, clients, logins):
+    latencies = []
+    failures = []
+    lock = threading.Lock()
+
+    def client_worker(worker_id):
+        client = app_module.app.test_client()
+        local_latencies = []
+        local_failures = 0
+        for i in range(logins):
+            admission_number = admission_numbers[(worker_id * logins + i) % len(admission_numbers)]
+            started = time.perf_counter()
+            ok = login(client, admission_number, password)
+            local_latencies.append(time.perf_counter() - started)
+            local_failures += not ok
+        with lock:
+            latencies.extend(local_latencies)
+            failures.append(local_failures)
+
+    elapsed = run_clients(clients, client_worker)
+    result = summarize(latencies, elapsed)
+    result['failures'] = sum(failures)
+    return result
+
+
+def run_route_benchmark(app_module, admission_numbers, password, clients, iterations, routes=ROUTES, seed=42):
+    """Each client logs in as a random student, then requests every route
+    `iterations` times. Latency and throughput are reported per route."""
+    latencies = {route: [] for route in routes}
+    failures = {route: 0 for route in routes}
+    busy_time = {route: 0.0 for route in routes}
+    lock = threading.Lock()
+
+    def client_worker(worker_id):
+        rng = random.Random(seed + worker_id)
+        client = app_module.app.test_client()
+        local = {route: [] for route in routes}
+        local_failures = {route: 0 for route in routes}
+        login(client, rng.choice(admission_numbers), password)
+        for _ in range(iterations):
+            for route in routes:
+                started = time.perf_counter()
+                if route == '/login':
+                    ok = login(client, rng.choice(admission_numbers), password)
+                else:
+                    response = client.get(route)
+                    ok = response.status_code == 200
+                    response.close()
+                local[route].append(time.perf_counter() - started)
+                local_failures[route] += not ok
+        with lock:
+            for route in routes:
+                latencies[route].extend(local[route])
+                failures[route] += local_failures[route]
+                busy_time[route] += sum(local[route])
+
+    elapsed = run_clients(clients, client_worker)
+    results = {}
+    for route in routes:
+        # Routes are interleaved, so throughput is the share of wall-clock
+        # time spent on this route spread across the clients.
+        route_elapsed = busy_time[route] / clients
+        results[route] = summarize(latencies[route], route_elapsed)
+        results[route]['failures'] = failures[route]
+    return results, elapsed
+
+
+def print_comparison(current, baseline_path):
+    with open(baseline_path) as handle:
+        baseline = json.load(handle)
+    print(f"\nChange against {baseline_path} (p95):")
+    for route, result in current['routes'].items():
+        before = baseline.get('routes', {}).get(route)
+        if not before or not before.get('p95_ms'):
+            print(f"  {route:<26} new")
+            continue
+        change = (result['p95_ms'] - before['p95_ms']) / before['p95_ms'] * 100
+        print(f"  {route:<26} {before['p95_ms']:>9} ms -> {result['p95_ms']:>9} ms ({change:+.1f}%)")
+
+
+def setup_app(hash_method):
+    workdir = tempfile.mkdtemp(prefix='hotspot-bench-')
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    # Keep benchmark logins out of the real session store.
+    os.environ['SESSION_DATABASE_URL'] = f"sqlite:///{os.path.join(workdir, 'sessions.db')}"
+    if hash_method:
+        os.environ['PASSWORD_HASH_METHOD'] = hash_method
+
+    import app as app_module
+    # Same schema as production, including the search index and its triggers.
+    app_module.upgrade_database()
+    return app_module
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--hash-method', default=None, help='Override PASSWORD_HASH_METHOD.')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed for the dataset.')
+    parser.add_argument('--clients', type=int, default=8, help='Concurrent in-process clients.')
+    parser.add_argument('--json', dest='json_path', default=None, help='Write results to this file.')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    login_parser = commands.add_parser('login', help='Login throughput.')
+    login_parser.add_argument('--logins', type=int, default=25, help='Logins per client.')
+    login_parser.add_argument('--students', type=int, default=200, help='Students to seed.')
+
+    routes_parser = commands.add_parser('routes', help='Latency of the main routes.')
+    routes_parser.add_argument('--students', type=int, default=2000, help='Students to seed.')
+    routes_parser.add_argument('--sessions', type=int, default=100000, help='Hotspot sessions to seed.')
+    routes_parser.add_argument('--requests', type=int, default=2000, help='Hotspot requests to seed.')
+    routes_parser.add_argument('--iterations', type=int, default=10, help='Passes over the routes per client.')
+    routes_parser.add_argument('--route', dest='routes', action='append', choices=ROUTES,
+                               help='Only benchmark this route (repeatable).')
+    routes_parser.add_argument('--compare', default=None, help='Earlier JSON results to compare with.')
+
+    # Options given before or after the sub-command both work.
+    for sub in (login_parser, routes_parser):
+        sub.add_argument('--clients', type=int, default=argparse.SUPPRESS)
+        sub.add_argument('--json', dest='json_path', default=argparse.SUPPRESS)
+        sub.add_argument('--hash-method', default=argparse.SUPPRESS)
+        sub.add_argument('--seed', type=int, default=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    app_module = setup_app(args.hash_method)
+    result = {
+        'benchmark': args.command,
+        'clients': args.clients,
+        'seed': args.seed,
+        'hash_method': app_module.app.config['PASSWORD_HASH_METHOD'],
+        'python': platform.python_version(),
+        'started_at': datetime.datetime.utcnow().isoformat(timespec='seconds'),
+    }
+
+    if args.command == 'login':
+        with app_module.app.app_context():
+            admission_numbers = generate_dataset(app_module, args.students, 0, 0, args.seed)
+        result.update(run_login_benchmark(app_module, admission_numbers, BENCH_PASSWORD,
+                                          args.clients, args.logins))
+        print(f"{result['requests']} logins with {args.clients} clients "
+              f"({result['hash_method']}): {result['throughput_per_sec']} logins/sec, "
+              f"p50 {result['p50_ms']} ms, p95 {result['p95_ms']} ms, p99 {result['p99_ms']} ms, "
+              f"{result['failures']} failures")
+    else:
+        started = time.perf_counter()
+        with app_module.app.app_context():
+            admission_numbers = generate_dataset(app_module, args.students, args.sessions,
+                                                 args.requests, args.seed)
+        print(f"Seeded {args.students} students, {args.sessions} sessions and "
+              f"{args.requests} requests in {time.perf_counter() - started:.1f}s")
+
+        routes, elapsed = run_route_benchmark(app_module, admission_numbers, BENCH_PASSWORD,
+                                              args.clients, args.iterations,
+                                              tuple(args.routes or ROUTES), args.seed)
+        result.update({
+            'dataset': {'students': args.students, 'sessions': args.sessions, 'requests': args.requests},
+            'iterations': args.iterations,
+            'elapsed_sec': round(elapsed, 2),
+            'routes': routes,
+        })
+        print(f"{'route':<26} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'fail':>5}")
+        for route, summary in routes.items():
+            print(f"{route:<26} {summary['throughput_per_sec']:>9} {summary['p50_ms']:>9} "
+                  f"{summary['p95_ms']:>9} {summary['p99_ms']:>9} {summary['failures']:>5}")
+        if args.compare:
+            print_comparison(result, args.compare)
+
+    if args.json_path:
+        with open(args.json_path, 'w') as handle:
+            json.dump(result, handle, indent=2)
+
+
+if __name__ == '__main__':
+    main()
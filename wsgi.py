@@ -0,0 +1,11 @@
+"""WSGI entry point, e.g. ``gunicorn wsgi:application``.
+
+Each worker applies any pending schema migrations (a single query when the
+database is current) and seeds an empty database; existing data is kept.
+"""
+from app import app, initialize_database, start_session_reaper
+
+initialize_database()
+start_session_reaper()
+
+application = app